@@ -0,0 +1,260 @@
+"""Benchmark module.
+
+This module defines seeded generators of synthetic workloads and a
+benchmark that times each stage of Miner.mine across a grid of dataset
+sizes, and the time a fresh interpreter takes to import frm. Memory is
+reported both as the peak bytes allocated while mining, traced with
+tracemalloc in a separate untimed run, and as the peak size of the pattern
+tree estimated by PatternMiner. The backends of frm.kernels can be compared
+on the bike rides in the experiments of the repository. Results are
+compared against the baseline stored in the experiments, so performance
+regressions show up without external data.
+
+Run as python -m frm.bench --help.
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import tracemalloc
+from itertools import product
+from os import listdir
+from os.path import exists, join
+
+import numpy as np
+
+from . import kernels
+from .miner import Miner
+
+GRID = {"n": [10, 100], "length": [100, 1000]}
+BIKE = join("experiments", "bike")
+BASELINE = join("experiments", "bench_baseline.json")
+
+# Memory figures compared against the baseline, besides stage times
+MEMORY = ("peak_memory", "tree_nbytes")
+
+
+def random_walks(n, length, seed=0):
+    """Generate n random walks of equal length."""
+    rng = np.random.default_rng(seed)
+    return np.cumsum(rng.standard_normal((n, length)), axis=1)
+
+
+def injected_motifs(n, length, fraction=0.5, seed=0):
+    """Generate random walks with a motif a tenth of their length injected in a fraction of them."""
+    rng = np.random.default_rng(seed)
+    data = random_walks(n, length, seed)
+    motif = np.cumsum(rng.standard_normal(max(length // 10, 1)))
+    for i in np.flatnonzero(rng.random(n) < fraction):
+        start = rng.integers(0, length - len(motif) + 1)
+        data[i, start : start + len(motif)] = motif + data[i, start]
+    return data
+
+
+def ragged(n, length, seed=0):
+    """Generate n random walks with lengths between half and one and a half times length."""
+    rng = np.random.default_rng(seed)
+    lengths = rng.integers(length // 2, length * 3 // 2 + 1, n)
+    return [np.cumsum(rng.standard_normal(m)) for m in lengths]
+
+
+def repetitive(n, length, period=50, seed=0):
+    """Generate noisy repetitions of one random shape of a given period."""
+    rng = np.random.default_rng(seed)
+    shape = np.cumsum(rng.standard_normal(period))
+    reps = -(-length // period)
+    data = np.tile(shape, (n, reps))[:, :length]
+    return data + 0.1 * rng.standard_normal((n, length))
+
+
+GENERATORS = {
+    "random_walks": random_walks,
+    "injected_motifs": injected_motifs,
+    "ragged": ragged,
+    "repetitive": repetitive,
+}
+
+
+def run(workloads=GENERATORS, grid=GRID, minsup=0.3, seglen=5, alpha=4, k=10, repeat=3):
+    """Time the stages of Miner.mine on all workloads and sizes in the grid.
+
+    Returns
+    -------
+    results : dict
+        Stage wall times in seconds of the fastest of repeat runs, peak bytes
+        allocated, peak bytes held by the pattern tree, and number of motifs,
+        keyed by "<workload> <n> <length>".
+    """
+    warm_up()
+    results = {}
+    for name, (n, length) in product(workloads, product(grid["n"], grid["length"])):
+        data = GENERATORS[name](n, length)
+        results[f"{name} {n} {length}"] = measure(
+            data, repeat, minsup=minsup, seglen=seglen, alpha=alpha, k=k
+        )
+    return results
+
+
+def measure(data, repeat=1, **params):
+    """Mine data repeat times with Miner(**params) and measure the fastest run."""
+    best = None
+    for _ in range(repeat):
+        miner = Miner(stats=True, **params)
+        motifs = miner.mine(data)
+        stages = {s: t["wall"] for s, t in miner.stats.stages.items()}
+        if best is None or sum(stages.values()) < sum(best["stages"].values()):
+            best = {
+                "stages": stages,
+                "tree_nbytes": miner.stats.peak_nbytes,
+                "motifs": len(motifs),
+            }
+    best["peak_memory"] = peak_memory(miner, data)
+    return best
+
+
+def warm_up():
+    """Call each kernel once, so compiling them is not timed."""
+    kernels.redundant(["ab", "a"], 0.5)
+    # Occurrences keep the data type of the time series, so both are compiled
+    for dtype in (np.float32, np.float64):
+        kernels.best_match(np.zeros((1, 4), dtype=dtype), np.zeros(4))
+
+
+def peak_memory(miner, data):
+    """Mine data while tracing allocations and get the peak bytes allocated.
+
+    Tracing slows down allocations, so this is a separate run from the timed one.
+    Memory-mapped files are not allocations and are not counted.
+    """
+    tracemalloc.start()
+    try:
+        miner.mine(data)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def bike(directory=BIKE, field="speed"):
+    """Load a field of the bike rides in the experiments of the repository."""
+    data = []
+    for file in sorted(listdir(directory)):
+        with open(join(directory, file)) as fp:
+            records = json.load(fp)
+        if records and field in records[0]:
+            values = [rec[field] for rec in records if rec[field] is not None]
+            if any(values):
+                data.append(values)
+    return data
+
+
+def compare_backends(data, minsup=0.3, seglen=6, alpha=4, k=4, repeat=3):
+    """Time the stages of Miner.mine with each available backend of frm.kernels.
+
+    Kernels are compiled before timing. Returns the fastest of repeat runs per
+    backend, in the same form as run, keyed by "bike <backend>". The pure Python
+    backend takes minutes to remove redundant patterns of all rides, so mining a
+    few of them is enough to compare backends.
+    """
+    previous = kernels.get_backend()
+    results = {}
+    for backend in kernels.BACKENDS:
+        try:
+            kernels.set_backend(backend)
+        except ImportError:
+            continue
+        warm_up()
+        results[f"bike {backend}"] = measure(
+            data, repeat, minsup=minsup, seglen=seglen, alpha=alpha, k=k
+        )
+    kernels.set_backend(previous)
+    return results
+
+
+def import_time(module="frm", repeat=5):
+    """Measure the time in seconds a fresh interpreter takes to import a module.
+
+    Returns the fastest of repeat imports, as the others are slowed down by noise.
+    """
+    code = f"from time import perf_counter; t = perf_counter(); import {module}; print(perf_counter() - t)"
+    times = []
+    for _ in range(repeat):
+        res = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, check=True
+        )
+        times.append(float(res.stdout))
+    return min(times)
+
+
+def compare(results, baseline, tolerance=0.5):
+    """Find stages and memory figures that regressed compared to a baseline.
+
+    A figure regresses if it is more than a fraction tolerance above its baseline.
+    Stages faster than 50 ms are too noisy to compare.
+
+    Returns
+    -------
+    regressions : list
+        Tuples of benchmark, figure, baseline value and new value.
+    """
+    regressions = []
+    for key, result in results.items():
+        if key not in baseline:
+            continue
+        figures = [(s, t) for s, t in result["stages"].items() if t > 0.05]
+        figures += [(m, result[m]) for m in MEMORY if m in result]
+        for figure, value in figures:
+            old = baseline[key]["stages"].get(figure, baseline[key].get(figure))
+            if old is not None and value > old * (1 + tolerance):
+                regressions.append((key, figure, old, value))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m frm.bench", description="Benchmark the mining pipeline."
+    )
+    parser.add_argument("--workloads", nargs="+", default=list(GENERATORS))
+    parser.add_argument("-n", type=int, nargs="+", default=GRID["n"])
+    parser.add_argument("--length", type=int, nargs="+", default=GRID["length"])
+    parser.add_argument(
+        "--baseline",
+        default=BASELINE,
+        help="JSON file with results to compare with, skipped if it does not exist",
+    )
+    parser.add_argument("--save", help="JSON file to save results to")
+    parser.add_argument("--tolerance", type=float, default=0.5)
+    parser.add_argument(
+        "--backends", action="store_true", help="compare backends on bike rides"
+    )
+    parser.add_argument("--bike", default=BIKE, help="directory with bike rides")
+    parser.add_argument(
+        "--rides", type=int, default=10, help="number of bike rides to mine"
+    )
+    args = parser.parse_args(argv)
+
+    results = run(args.workloads, {"n": args.n, "length": args.length})
+    if args.backends:
+        results.update(compare_backends(bike(args.bike)[: args.rides]))
+    results["import frm"] = {"stages": {"import": import_time()}, "motifs": 0}
+    for key, result in results.items():
+        figures = [f"{s}={t:.3f}s" for s, t in result["stages"].items()]
+        figures += [f"{m}={result[m] / 1e6:.1f}MB" for m in MEMORY if m in result]
+        print(f"{key}: {' '.join(figures)}")
+
+    if args.save:
+        with open(args.save, "w") as fp:
+            json.dump(results, fp, indent=2)
+
+    if args.baseline and exists(args.baseline):
+        with open(args.baseline) as fp:
+            baseline = json.load(fp)
+        regressions = compare(results, baseline, args.tolerance)
+        for key, figure, old, new in regressions:
+            print(f"Regression in {key} {figure}: {old:.3g} -> {new:.3g}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
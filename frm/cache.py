@@ -0,0 +1,150 @@
+"""Cache module.
+
+This module defines the Cache class, an on-disk cache of the intermediate
+results of Miner.mine. Entries are keyed by a content hash of the time
+series and the parameters of the stage that produced them, so changing a
+parameter of a later stage reuses the results of the earlier stages:
+
+- sax: the discretised sequences, keyed by seglen, alpha and diff;
+- tree: the tree of frequent patterns, additionally keyed by minsup and omax;
+- motifs: the mapped motifs with their tree, additionally keyed by k, mass,
+  eta and dtype.
+
+Entries are directories that are evicted in least recently used order when
+the cache grows beyond its size cap.
+"""
+
+from contextlib import contextmanager
+from hashlib import blake2b
+from os import getpid, listdir, makedirs, rename, utime, walk
+from os.path import getmtime, getsize, isdir, join
+from shutil import rmtree
+from threading import get_ident
+
+import numpy as np
+
+from . import serialize
+
+
+class Cache:
+    """On-disk cache of intermediate results of the mining pipeline.
+
+    Parameters
+    ----------
+    path : str
+        Directory to store entries in, created if it does not exist.
+    max_bytes : int, optional
+        Size of the cache above which least recently used entries are evicted.
+    """
+
+    def __init__(self, path, max_bytes=2**30):
+        self.path = path
+        self.max_bytes = max_bytes
+        makedirs(path, exist_ok=True)
+
+    def __repr__(self):
+        return f"Cache('{self.path}')"
+
+    def get(self, key):
+        """Get directory of an entry and mark it as used, or None if not cached."""
+        path = join(self.path, key)
+        if not isdir(path):
+            return None
+        try:
+            utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    @contextmanager
+    def put(self, key):
+        """Add an entry by writing it to the directory yielded by the with-block.
+
+        The entry is written to a temporary directory first, so other processes
+        never see incomplete entries.
+        """
+        tmp = join(self.path, f".{key}.{getpid()}.{get_ident()}")
+        makedirs(tmp, exist_ok=True)
+        try:
+            yield tmp
+            rename(tmp, join(self.path, key))
+        except OSError:
+            # Caching is best effort, another process may have added the entry first
+            pass
+        finally:
+            rmtree(tmp, ignore_errors=True)
+        self.evict()
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits its size cap."""
+        entries = []
+        for name in listdir(self.path):
+            path = join(self.path, name)
+            if name.startswith(".") or not isdir(path):
+                continue
+            try:
+                entries.append((getmtime(path), entry_size(path), path))
+            except FileNotFoundError:
+                continue
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            rmtree(path, ignore_errors=True)
+            total -= size
+
+    def load_sequences(self, key):
+        """Get cached discretised sequences, or None if not cached."""
+        path = self.get(key)
+        if path is None:
+            return None
+        symbols = np.load(join(path, "symbols.npy"))
+        return serialize.unpack(symbols, np.load(join(path, "ptr.npy")))
+
+    def save_sequences(self, key, sequences):
+        """Cache discretised sequences."""
+        symbols, ptr = serialize.pack([str(sequence) for sequence in sequences])
+        with self.put(key) as path:
+            np.save(join(path, "symbols.npy"), symbols)
+            np.save(join(path, "ptr.npy"), ptr)
+
+    def load_tree(self, key):
+        """Get cached tree of frequent patterns, or None if not cached."""
+        path = self.get(key)
+        return None if path is None else serialize.load(path)[0]
+
+    def save_tree(self, key, frequent):
+        """Cache tree of frequent patterns."""
+        with self.put(key) as path:
+            serialize.save(path, frequent=frequent)
+
+    def load_motifs(self, key):
+        """Get cached tree of frequent patterns and motifs, or None if not cached."""
+        path = self.get(key)
+        return None if path is None else serialize.load(path)
+
+    def save_motifs(self, key, motifs, frequent):
+        """Cache motifs with the tree of frequent patterns they were mapped from."""
+        with self.put(key) as path:
+            serialize.save(path, frequent=frequent, motifs=motifs)
+
+
+def fingerprint(ts):
+    """Hash the contents of a database of time series."""
+    h = blake2b(digest_size=16)
+    for series in ts:
+        series = np.ascontiguousarray(series)
+        h.update(f"{series.dtype} {len(series)}".encode())
+        h.update(series.data)
+    return h.hexdigest()
+
+
+def make_key(stage, *params):
+    """Make key of an entry from the stage that produced it and its parameters."""
+    return f"{stage}-{blake2b(repr(params).encode(), digest_size=16).hexdigest()}"
+
+
+def entry_size(path):
+    """Get total size of the files in an entry."""
+    return sum(getsize(join(root, f)) for root, _, files in walk(path) for f in files)
@@ -0,0 +1,251 @@
+"""Command line module.
+
+This module defines the frm-miner command, which mines every combination
+of a collection of datasets and a grid of parameters on a pool of worker
+processes. Jobs are only started while their estimated memory use fits in
+the memory budget, and jobs whose results are already in the results
+store are skipped, so interrupted batches can simply be restarted.
+"""
+
+import argparse
+import json
+import sqlite3
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import product
+from os import cpu_count, listdir, sysconf
+from os.path import getsize, isdir, isfile, join, normpath
+from time import perf_counter, process_time
+
+from .io import read_cached, read_csv, read_json, read_ucr, split
+from .miner import Miner
+from .storage import META, FlatDataset
+
+PARAMETERS = ["minsup", "seglen", "alpha", "omax", "diff", "k"]
+READERS = {".tsv": read_ucr, ".json": read_json, ".csv": read_csv}
+
+# Rough ratio between peak memory use of a job and the size of its data files
+MEMORY_FACTOR = 20
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="frm-miner", description="Mine frequent representative motifs."
+    )
+    parser.add_argument(
+        "datasets",
+        nargs="+",
+        help="dataset files or directories, directories of datasets, or .txt manifests",
+    )
+    parser.add_argument("--minsup", type=float, nargs="+", required=True)
+    parser.add_argument("--seglen", type=int, nargs="+", required=True)
+    parser.add_argument("--alpha", type=int, nargs="+", required=True)
+    parser.add_argument("--omax", type=float, nargs="+", default=[0.8])
+    parser.add_argument("--diff", type=int, nargs="+", default=[0])
+    parser.add_argument("-k", type=int, nargs="+", default=[0])
+    parser.add_argument("--field", help="field to load from .json and .csv files")
+    parser.add_argument("--results", default="results.sqlite")
+    parser.add_argument("--processes", type=int, default=cpu_count())
+    parser.add_argument("--memory", type=float, help="memory budget in bytes")
+    args = parser.parse_args(argv)
+
+    store = ResultStore(args.results)
+    grid = list(product(*[getattr(args, p) for p in PARAMETERS]))
+    jobs = [
+        (dataset, dict(zip(PARAMETERS, params)), args.field)
+        for dataset in find_datasets(args.datasets)
+        for params in grid
+    ]
+    jobs = [job for job in jobs if not store.seen(*job)]
+    print(f"{len(jobs)} jobs to go")
+
+    memory = args.memory or sysconf("SC_PAGE_SIZE") * sysconf("SC_PHYS_PAGES")
+    failed = 0
+    for result in schedule(jobs, args.processes, memory):
+        if "error" in result:
+            # Failed jobs are not stored, so they are retried by the next batch
+            failed += 1
+            print(f"{result['dataset']} {result['params']}: {result['error']}")
+            continue
+        store.add(result)
+        print(f"{result['dataset']} {result['params']}: {result['seconds']:.2f}s")
+    store.close()
+    if failed:
+        print(f"{failed} jobs failed")
+
+
+def find_datasets(paths):
+    """Expand manifests and directories of datasets into datasets."""
+    datasets = []
+    for path in paths:
+        if path.endswith(".txt"):
+            with open(path) as fp:
+                datasets += find_datasets([line.strip() for line in fp if line.strip()])
+        elif isdir(path) and not is_dataset(path):
+            datasets += find_datasets(sorted(join(path, p) for p in listdir(path)))
+        else:
+            datasets.append(normpath(path))
+    return datasets
+
+
+def is_dataset(path):
+    """Check if directory is a FlatDataset or contains data files directly."""
+    files = listdir(path)
+    return META in files or any(f.endswith(tuple(READERS)) for f in files)
+
+
+def get_files(path):
+    """Get data files of a dataset."""
+    if not isdir(path) or META in listdir(path):
+        return [path]
+    return [join(path, f) for f in sorted(listdir(path)) if f.endswith(tuple(READERS))]
+
+
+def load_dataset(path, field=None):
+    """Load a dataset as a FlatDataset or a list of time series.
+
+    Without a field, the first column of .csv files is loaded; .json files
+    require a field.
+    """
+    if isdir(path) and META in listdir(path):
+        return FlatDataset(path)
+
+    results = []
+    for file in get_files(path):
+        reader = READERS[file[file.rfind(".") :]]
+        if reader is read_ucr:
+            args = ()
+        elif reader is read_csv:
+            args = (0 if field is None else field,)
+        elif field is None:
+            raise ValueError(f"{file}: --field is required for .json files")
+        else:
+            args = (field,)
+        results.append(read_cached(file, reader, args))
+    return list(split(results))
+
+
+def estimate_memory(path):
+    """Estimate peak memory use of mining a dataset from the size of its files."""
+    files = get_files(path)
+    if isdir(files[0]):
+        files = [join(files[0], f) for f in listdir(files[0])]
+    return MEMORY_FACTOR * sum(getsize(f) for f in files if isfile(f))
+
+
+def schedule(jobs, processes, memory):
+    """Run jobs, starting a job only if its estimated memory fits the budget.
+
+    A job that does not fit the budget on its own is started when no other
+    jobs are running. Results are yielded as jobs finish. A job that fails
+    yields its dataset, parameters and error instead, and the other jobs
+    continue.
+    """
+    pending = sorted(jobs, key=lambda job: estimate_memory(job[0]))
+    running = {}
+    submitted = {}
+    with ProcessPoolExecutor(processes) as executor:
+        while pending or running:
+            used = sum(running.values())
+            while pending and len(running) < processes:
+                needed = estimate_memory(pending[0][0])
+                if running and used + needed > memory:
+                    break
+                job = pending.pop(0)
+                future = executor.submit(run, *job)
+                running[future] = needed
+                submitted[future] = job
+                used += needed
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                running.pop(future)
+                dataset, params, _ = submitted.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = {"dataset": dataset, "params": params, "error": repr(e)}
+                yield result
+
+
+def run(dataset, params, field=None):
+    """Mine one dataset with one setting of parameters."""
+    data = load_dataset(dataset, field)
+    miner = Miner(**params)
+
+    wall, cpu = perf_counter(), process_time()
+    motifs = miner.mine(data)
+    wall, cpu = perf_counter() - wall, process_time() - cpu
+
+    return {
+        "dataset": dataset,
+        "params": params,
+        "field": field,
+        "seconds": wall,
+        "cpu_seconds": cpu,
+        "motifs": [[m.pattern, m.distance] for m in motifs],
+    }
+
+
+class ResultStore:
+    """SQLite store of results, keyed by dataset and parameters.
+
+    The field loaded from .csv and .json files is stored with the parameters,
+    so mining other fields of the same datasets is not skipped.
+    """
+
+    def __init__(self, filename):
+        self.con = sqlite3.connect(filename)
+        self.con.execute(
+            "CREATE TABLE IF NOT EXISTS results (dataset TEXT, params TEXT, "
+            "seconds REAL, cpu_seconds REAL, motifs TEXT, PRIMARY KEY (dataset, params))"
+        )
+
+    def seen(self, dataset, params, field=None):
+        key = (dataset, dump_params(params, field))
+        query = "SELECT 1 FROM results WHERE dataset = ? AND params = ?"
+        return self.con.execute(query, key).fetchone() is not None
+
+    def add(self, result):
+        self.con.execute(
+            "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+            (
+                result["dataset"],
+                dump_params(result["params"], result.get("field")),
+                result["seconds"],
+                result["cpu_seconds"],
+                json.dumps(result["motifs"]),
+            ),
+        )
+        self.con.commit()
+
+    def results(self):
+        """Get all results as dictionaries."""
+        query = "SELECT dataset, params, seconds, cpu_seconds, motifs FROM results"
+        results = []
+        for dataset, params, seconds, cpu_seconds, motifs in self.con.execute(query):
+            params = json.loads(params)
+            results.append(
+                {
+                    "dataset": dataset,
+                    "params": params,
+                    "field": params.pop("field", None),
+                    "seconds": seconds,
+                    "cpu_seconds": cpu_seconds,
+                    "motifs": json.loads(motifs),
+                }
+            )
+        return results
+
+    def close(self):
+        self.con.close()
+
+
+def dump_params(params, field=None):
+    """Serialise parameters to JSON, with the field if one is loaded."""
+    if field is not None:
+        params = {**params, "field": field}
+    return json.dumps(params, sort_keys=True)
+
+
+if __name__ == "__main__":
+    main()
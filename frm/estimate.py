@@ -0,0 +1,134 @@
+"""Estimate module.
+
+This module defines the estimate function, which predicts the cost of
+mining a collection of sequences without mining it. Supports of 1- and
+2-patterns are counted exactly. Longer patterns are enumerated under a
+first-order Markov model of the sequences fitted on the same counts: the
+probability of a pattern is the probability of its first symbol times the
+transition probabilities of the following symbols, which gives its
+expected number of occurrences and its expected support. Long exact
+repetitions, as in strongly periodic data, are more frequent than such a
+model predicts, so their cost is underestimated.
+"""
+
+from collections import Counter, defaultdict
+
+import numpy as np
+
+from .motif import MOTIF_BYTES, OCCURRENCE_BYTES, SEQUENCE_BYTES
+from .patterns import PatternMiner
+from .stats import Stats
+
+# Mapping reads every occurrence of a pattern twice: once to average it into the
+# representative and once to find the best match in its time series
+MAPPING_PASSES = 2
+
+
+def estimate(sequences, minsup, seglen=1, max_patterns=100_000):
+    """Estimate candidates, occurrences and memory per level.
+
+    Parameters
+    ----------
+    sequences : list
+        Collection of sequences with discrete values.
+    minsup : float
+        The minimum support for a pattern.
+    seglen : int, optional
+        Segment length used to discretise the sequences, to estimate mapping cost.
+    max_patterns : int, optional
+        Number of frequent patterns after which enumeration stops.
+
+    Returns
+    -------
+    estimate : dict
+        Per-level candidates, frequent patterns, occurrences, bytes held before
+        pruning and values read while mapping the frequent patterns, the peak bytes
+        held by the pattern tree, the number of frequent patterns, the total number
+        of values read while mapping them, and whether enumeration stopped at
+        max_patterns.
+    """
+    stats = Stats()
+    pm = PatternMiner(minsup, 1, stats, max_len=2)
+    pm.mine(sequences)
+    min_freq = len(sequences) * minsup
+
+    # Occurrences of a pattern are read with those of its children when mapping
+    mapped = Counter()
+    for pattern, motif in pm.frequent.items():
+        mapped[len(pattern)] += sum(len(i) for i in motif.get_all_indexes().values())
+    levels = []
+    for level in stats.levels:
+        values = MAPPING_PASSES * mapped[level["k"]] * level["k"] * seglen
+        levels.append(dict(level, mapping_values=values, exact=True))
+
+    # Fit Markov model on symbol and transition counts
+    first, transitions = Counter(), defaultdict(Counter)
+    for sequence in sequences:
+        sequence = str(sequence)
+        first.update(sequence)
+        for a, b in zip(sequence, sequence[1:]):
+            transitions[a][b] += 1
+    symbols = sum(first.values())
+    for a, counts in transitions.items():
+        total = sum(counts.values())
+        transitions[a] = {b: count / total for b, count in counts.items()}
+
+    # Group sequences by length to compute expected supports
+    lengths, counts = np.unique([len(s) for s in sequences], return_counts=True)
+
+    frontier = {
+        p: first[p[0]] / symbols * transitions[p[0]][p[1]]
+        for p in pm.frequent
+        if len(p) == 2
+    }
+    frequent = set(frontier)
+    tree = pm.nbytes
+    truncated = False
+    k = 2
+    while frontier:
+        k += 1
+        windows = np.maximum(lengths - k + 1, 0)
+        candidates = occurrences = pairs = mapping = 0
+        new = {}
+        for pattern, prob in frontier.items():
+            for symbol, transition in transitions[pattern[-1]].items():
+                candidate = pattern + symbol
+                if candidate[1:] not in frequent:
+                    continue
+                prob_candidate = prob * transition
+                supported = counts @ (1 - np.exp(-windows * prob_candidate))
+                candidates += 1
+                occurrences += counts @ windows * prob_candidate
+                pairs += supported
+                if supported >= min_freq:
+                    new[candidate] = prob_candidate
+                    mapping += counts @ windows * prob_candidate * k
+
+        nbytes = tree + candidates * MOTIF_BYTES
+        nbytes += occurrences * OCCURRENCE_BYTES + pairs * SEQUENCE_BYTES
+        tree += len(new) * MOTIF_BYTES
+        levels.append(
+            {
+                "k": k,
+                "candidates": candidates,
+                "pruned": candidates - len(new),
+                "kept": len(new),
+                "occurrences": occurrences,
+                "nbytes": nbytes,
+                "mapping_values": MAPPING_PASSES * mapping * seglen,
+                "exact": False,
+            }
+        )
+        frontier = new
+        frequent = set(new)
+        if sum(lvl["kept"] for lvl in levels) > max_patterns:
+            truncated = True
+            break
+
+    return {
+        "levels": levels,
+        "peak_nbytes": max([lvl["nbytes"] for lvl in levels], default=0),
+        "patterns": sum(lvl["kept"] for lvl in levels),
+        "mapping_values": sum(lvl["mapping_values"] for lvl in levels),
+        "truncated": truncated,
+    }
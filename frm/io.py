@@ -0,0 +1,161 @@
+"""Input module.
+
+This module defines streaming loaders for JSON, CSV and UCR files. Only
+the requested field is parsed from each file, straight into a flat buffer
+of values, and the loaded time series are written to a FlatDataset. The
+values parsed from a file are cached in a binary sidecar file next to it,
+so loading the same field again does not parse the file again.
+"""
+
+import csv
+import re
+from array import array
+from functools import partial
+from multiprocessing import Pool
+from os import getpid, remove, replace
+from os.path import getmtime, isfile
+from urllib.parse import quote
+
+import numpy as np
+
+from .storage import FlatDataset
+
+
+def load_json(paths, field, path, **kwargs):
+    """Load one field from JSON files with a list of records each.
+
+    Parameters
+    ----------
+    paths : list
+        JSON files, each containing one time series.
+    field : str
+        Name of the field to load.
+    path : str
+        Directory to write the FlatDataset to.
+    **kwargs
+        Passed to load.
+
+    Returns
+    -------
+    FlatDataset with the non-empty time series.
+    """
+    return load(paths, read_json, (field,), path, **kwargs)
+
+
+def load_csv(paths, column, path, delimiter=",", **kwargs):
+    """Load one column from CSV files, see load_json.
+
+    The column can be given by name if the files have a header, or by index
+    if they do not.
+    """
+    return load(paths, read_csv, (column, delimiter), path, **kwargs)
+
+
+def load_ucr(paths, path, **kwargs):
+    """Load UCR archive files with one labelled time series per row, see load_json."""
+    return load(paths, read_ucr, (), path, **kwargs)
+
+
+def load(paths, reader, args, path, processes=0, cache=True, dtype=np.float64):
+    """Load time series from files into a FlatDataset.
+
+    Parameters
+    ----------
+    paths : list
+        Files to load.
+    reader : callable
+        Function taking a filename and args, returning values and lengths.
+    args : tuple
+        Extra arguments for reader.
+    path : str
+        Directory to write the FlatDataset to.
+    processes : int, optional
+        Number of worker processes parsing files. If 0, files are parsed in this process.
+    cache : bool, optional
+        Whether to read and write binary sidecar files.
+    dtype : dtype, optional
+        Data type of the stored values.
+    """
+    read = partial(read_cached, reader=reader, args=args, cache=cache)
+
+    if processes:
+        with Pool(processes) as p:
+            return FlatDataset.create(path, split(p.imap(read, paths)), dtype)
+    return FlatDataset.create(path, split(map(read, paths)), dtype)
+
+
+def split(results):
+    """Yield non-empty time series from values and lengths of each file."""
+    for values, lengths in results:
+        for ts in np.split(values, np.cumsum(lengths)[:-1]):
+            if len(ts):
+                yield ts
+
+
+def read_cached(filename, reader, args, cache=True):
+    """Read file, using a sidecar file if it is newer than the file itself."""
+    names = [quote(str(arg), safe="") for arg in args]
+    sidecar = ".".join([filename, *names, reader.__name__, "npz"])
+    if cache and isfile(sidecar) and getmtime(sidecar) >= getmtime(filename):
+        with np.load(sidecar) as npz:
+            return npz["values"], npz["lengths"]
+
+    values, lengths = reader(filename, *args)
+    if cache:
+        # Write to a temporary file first, other processes may be reading the sidecar
+        tmp = f"{sidecar}.{getpid()}"
+        try:
+            with open(tmp, "wb") as fp:
+                np.savez(fp, values=values, lengths=lengths)
+            replace(tmp, sidecar)
+        except OSError:
+            pass
+        finally:
+            if isfile(tmp):
+                remove(tmp)
+    return values, lengths
+
+
+def read_json(filename, field):
+    """Read one field from a JSON list of records, line by line.
+
+    Records are not decoded; only values of the field are parsed. Values may
+    be numbers or strings containing numbers. Missing values (null or empty
+    strings) are skipped.
+    """
+    pattern = re.compile(
+        rf'"{re.escape(field)}"\s*:\s*(?:"((?:[^"\\]|\\.)*)"|([^,}}\]\s]+))'
+    )
+    values = array("d")
+    with open(filename) as fp:
+        for line in fp:
+            for string, value in pattern.findall(line):
+                value = string.strip() or value
+                if value and value != "null":
+                    values.append(float(value))
+    return np.frombuffer(values, dtype=np.float64), np.array([len(values)])
+
+
+def read_csv(filename, column, delimiter=","):
+    """Read one column from a CSV file. Empty values are skipped."""
+    values = array("d")
+    with open(filename, newline="") as fp:
+        reader = csv.reader(fp, delimiter=delimiter)
+        if isinstance(column, str):
+            column = next(reader).index(column)
+        for row in reader:
+            if len(row) > column and row[column]:
+                values.append(float(row[column]))
+    return np.frombuffer(values, dtype=np.float64), np.array([len(values)])
+
+
+def read_ucr(filename):
+    """Read all time series from a UCR archive file, dropping labels and NaNs."""
+    values = array("d")
+    lengths = []
+    with open(filename) as fp:
+        for row in fp:
+            ts = [float(x) for x in row.rstrip("\n").split("\t")[1:] if x != "NaN"]
+            values.extend(ts)
+            lengths.append(len(ts))
+    return np.frombuffer(values, dtype=np.float64), np.array(lengths)
@@ -0,0 +1,214 @@
+"""Kernels module.
+
+This module defines the innermost loops of the pipeline: the longest common
+subsequence of patterns used to remove redundant patterns, and the distances
+from the occurrences of a pattern to its representative used to select best
+matches. Each kernel has a pure Python and NumPy implementation and, if
+Numba is installed (pip install frm-miner[fast]), a JIT-compiled one, which
+is used automatically. The environment variable FRM_BACKEND or set_backend
+selects a backend explicitly.
+
+Numba is only imported and the kernels are only compiled when a kernel is
+first called, so importing frm stays fast.
+"""
+
+import os
+from importlib.util import find_spec
+from threading import Lock
+
+import numpy as np
+
+from .preprocessing import zscore
+
+BACKENDS = ("python", "numba")
+
+_backend = None
+_compiled = False
+
+# Kernels are first used by the threads of Miner.mine_many at the same time
+_lock = Lock()
+
+
+def get_backend():
+    """Get the backend of the kernels, "numba" if Numba is installed, else "python"."""
+    if _backend is None:
+        default = "numba" if find_spec("numba") is not None else "python"
+        set_backend(os.environ.get("FRM_BACKEND", default))
+    return _backend
+
+
+def set_backend(name):
+    """Use the kernels of a backend, compiling them if needed.
+
+    Raises ImportError if the backend is "numba" and Numba is not installed.
+    """
+    global _backend, _compiled
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown backend {name}, expected one of {BACKENDS}")
+    with _lock:
+        if name == "numba" and not _compiled:
+            from numba import njit
+
+            # Replace the kernels by compiled ones, so they call each other compiled
+            for kernel in ("lcs_kernel", "redundant_kernel", "best_match_kernel"):
+                globals()[kernel] = njit(cache=True, nogil=True)(globals()[kernel])
+            _compiled = True
+        _backend = name
+
+
+def lcs(p1, p2):
+    """Length of the longest common subsequence of two patterns."""
+    if get_backend() == "numba":
+        return int(lcs_kernel(encode(p1), encode(p2)))
+
+    n, m = len(p1), len(p2)
+    L = [[0] * (m + 1) for i in range(n + 1)]
+    for i in range(n + 1):
+        for j in range(m + 1):
+            if i == 0 or j == 0:
+                L[i][j] = 0
+            elif p1[i - 1] == p2[j - 1]:
+                L[i][j] = L[i - 1][j - 1] + 1
+            else:
+                L[i][j] = max(L[i - 1][j], L[i][j - 1])
+    return L[n][m]
+
+
+def redundant(patterns, omax):
+    """Find patterns that consist mostly of the lcs with a longer, non-redundant pattern.
+
+    Parameters
+    ----------
+    patterns : list
+        Patterns, ordered from long to short.
+    omax : float
+        Maximum fraction of a pattern contained in a longer pattern.
+
+    Returns
+    -------
+    pruned : set
+        Redundant patterns.
+    """
+    if get_backend() == "numba":
+        lengths = np.array([len(p) for p in patterns], dtype=np.int64)
+        ptr = np.concatenate(([0], np.cumsum(lengths)))
+        mask = redundant_kernel(encode("".join(patterns)), ptr, omax)
+        return {p for p, pruned in zip(patterns, mask) if pruned}
+
+    pruned = set()
+    for p1 in patterns:
+        if p1 in pruned:
+            continue
+        for p2 in patterns:
+            n, m = len(p1), len(p2)
+            # Only check unseen patterns and pairs
+            if m >= n or p2 in pruned:
+                continue
+
+            # Check if shorter pattern consists mostly of lcs
+            if lcs(p1, p2) / m > omax:
+                pruned.add(p2)
+    return pruned
+
+
+def best_match(occurrences, representative):
+    """Find the occurrence closest to a representative.
+
+    Occurrences are the rows of an array, padded with NaN at the end of the series,
+    and keep the data type of the series they were taken from. Distances are
+    Euclidean distances between the z-normalised occurrence and the representative,
+    ignoring NaN.
+
+    Returns
+    -------
+    index : int
+        Row of the closest occurrence.
+    distance : float
+        Its distance to the representative.
+    """
+    occurrences = np.asarray(occurrences)
+    if get_backend() == "numba":
+        index, dist = best_match_kernel(
+            occurrences, np.asarray(representative, dtype=np.float64)
+        )
+        return int(index), float(dist)
+
+    best, min_dist = 0, np.inf
+    for i, occ in enumerate(occurrences):
+        occ = zscore(occ, nan_policy="omit")
+        dist = np.sqrt(np.nansum(np.square(representative - occ), dtype=np.float64))
+        if dist < min_dist:
+            best, min_dist = i, dist
+    return best, float(min_dist)
+
+
+def encode(pattern):
+    """Get the symbols of a pattern as bytes."""
+    return np.frombuffer(pattern.encode("latin-1"), dtype=np.uint8)
+
+
+# The kernels below are compiled by Numba; they are too slow to run interpreted
+
+
+def lcs_kernel(a, b):
+    """Length of the longest common subsequence of two arrays of symbols."""
+    row = np.zeros(len(b) + 1, dtype=np.int64)
+    for i in range(len(a)):
+        diagonal = 0
+        for j in range(len(b)):
+            above = row[j + 1]
+            if a[i] == b[j]:
+                row[j + 1] = diagonal + 1
+            elif row[j] > above:
+                row[j + 1] = row[j]
+            diagonal = above
+    return row[len(b)]
+
+
+def redundant_kernel(symbols, ptr, omax):
+    """Mark redundant patterns among concatenated patterns ordered from long to short."""
+    n = len(ptr) - 1
+    pruned = np.zeros(n, dtype=np.bool_)
+    for i in range(n):
+        if pruned[i]:
+            continue
+        p1 = symbols[ptr[i] : ptr[i + 1]]
+        for j in range(n):
+            m = ptr[j + 1] - ptr[j]
+            if m >= len(p1) or pruned[j]:
+                continue
+            if lcs_kernel(p1, symbols[ptr[j] : ptr[j + 1]]) / m > omax:
+                pruned[j] = True
+    return pruned
+
+
+def best_match_kernel(occurrences, representative):
+    """Find the occurrence closest to a representative, see best_match."""
+    best, min_dist = 0, np.inf
+    for j in range(occurrences.shape[0]):
+        occ = occurrences[j]
+
+        # Mean and standard deviation of the values that are not NaN
+        count, total = 0, 0.0
+        for i in range(len(occ)):
+            if not np.isnan(occ[i]):
+                count += 1
+                total += occ[i]
+        mean = total / max(count, 1)
+        var = 0.0
+        for i in range(len(occ)):
+            if not np.isnan(occ[i]):
+                var += (occ[i] - mean) ** 2
+        std = np.sqrt(var / max(count, 1))
+
+        # Constant occurrences cannot be z-normalised, so all their terms are NaN
+        dist = 0.0
+        if std > 0:
+            for i in range(len(occ)):
+                if not np.isnan(occ[i]):
+                    diff = representative[i] - (occ[i] - mean) / std
+                    dist += diff * diff
+        dist = np.sqrt(dist)
+        if dist < min_dist:
+            best, min_dist = j, dist
+    return best, min_dist
@@ -0,0 +1,164 @@
+"""Matcher module.
+
+This module defines the PatternMatcher class, which finds occurrences of
+mined patterns in new sequences. The patterns are compiled into an
+Aho-Corasick automaton: a trie of the patterns in which every state also
+knows where to continue after a mismatch, so all occurrences of all
+patterns are found in one pass over a sequence, regardless of how many
+patterns there are. Transitions are precomputed for every symbol, so each
+symbol of a sequence costs a single dictionary lookup.
+
+Occurrences can be confirmed against the representatives of mapped motifs
+with the z-normalised Euclidean distance, to filter out occurrences whose
+shape differs from the motif despite having the same SAX representation.
+"""
+
+from collections import deque
+
+import numpy as np
+
+from .motif import Motif, znorm
+
+
+class PatternMatcher:
+    """Find occurrences of patterns in sequences with an Aho-Corasick automaton.
+
+    Parameters
+    ----------
+    patterns : iterable
+        Patterns as strings or Motif objects, e.g. PatternMiner.frequent or Miner.motifs.
+
+    Attributes
+    ----------
+    patterns : list
+        Patterns, in the order given.
+    motifs : dict
+        Motif objects of the patterns given as motifs, keyed by pattern.
+    """
+
+    def __init__(self, patterns):
+        self.patterns = []
+        self.motifs = {}
+        for pattern in patterns:
+            if isinstance(pattern, Motif):
+                self.motifs[pattern.pattern] = pattern
+                pattern = pattern.pattern
+            self.patterns.append(pattern)
+
+        # Build trie of patterns
+        goto, self._out = [{}], [[]]
+        for i, pattern in enumerate(self.patterns):
+            state = 0
+            for symbol in pattern:
+                if symbol not in goto[state]:
+                    goto.append({})
+                    self._out.append([])
+                    goto[state][symbol] = len(goto) - 1
+                state = goto[state][symbol]
+            self._out[state].append(i)
+
+        # Add failure transitions in breadth-first order, so those of shorter prefixes exist
+        fail = [0] * len(goto)
+        self._delta = [goto[0]] + [None] * (len(goto) - 1)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            self._delta[state] = {**self._delta[fail[state]], **goto[state]}
+            self._out[state] += self._out[fail[state]]
+            for symbol, child in goto[state].items():
+                fail[child] = self._delta[fail[state]].get(symbol, 0)
+                queue.append(child)
+
+    def __len__(self):
+        return len(self.patterns)
+
+    def find(self, sequence, offset=0):
+        """Find all occurrences of the patterns in a sequence.
+
+        Parameters
+        ----------
+        sequence : str
+            Sequence with discrete values, e.g. discretised with frm.preprocessing.sax.
+        offset : int, optional
+            Position of the first symbol of sequence, added to all starts.
+
+        Returns
+        -------
+        matches : list
+            Tuples of start and pattern, ordered by end.
+        """
+        return list(self.iter_find([sequence], offset))
+
+    def iter_find(self, chunks, offset=0):
+        """Find occurrences of the patterns in a stream of chunks of one sequence.
+
+        Occurrences that span chunks are found as well, so chunks can be fed as
+        they arrive.
+
+        Yields
+        ------
+        match : tuple
+            Start and pattern of an occurrence, ordered by end.
+        """
+        delta, out, patterns = self._delta, self._out, self.patterns
+        state = 0
+        end = offset
+        for chunk in chunks:
+            for symbol in chunk:
+                end += 1
+                state = delta[state].get(symbol, 0)
+                for i in out[state]:
+                    yield end - len(patterns[i]), patterns[i]
+
+    def confirm(self, series, matches, seglen, eta=1.0):
+        """Confirm occurrences against the representatives of their motifs.
+
+        An occurrence is confirmed if the z-normalised Euclidean distance to the
+        representative, divided by the square root of its length, is at most eta
+        times the distance of the motif. Motifs are trimmed by less than a segment
+        at the start, so the best alignment within the first segment is used.
+        Motifs whose mapping was abandoned have no finite distance, so their
+        occurrences are never confirmed.
+
+        Parameters
+        ----------
+        series : array_like
+            Time series the sequence was discretised from.
+        matches : list
+            Tuples of start in the sequence and pattern, as returned by find.
+        seglen : int
+            Segment length the series was discretised with.
+        eta : float, optional
+            Maximum distance relative to the distance of the motif.
+
+        Returns
+        -------
+        confirmed : list
+            Tuples of start in the time series, motif and distance.
+        """
+        series = np.asarray(series)
+        confirmed = []
+        for start, pattern in matches:
+            motif = self.motifs.get(pattern)
+            if (
+                motif is None
+                or motif.representative is None
+                or not np.isfinite(motif.distance)
+            ):
+                continue
+
+            best, best_dist = None, np.inf
+            for shift in range(seglen):
+                begin = start * seglen + shift
+                window = series[begin : begin + motif.length]
+                if len(window) < motif.length:
+                    break
+                diff = znorm(window) - motif.representative
+                dist = np.sqrt(np.nansum(diff**2, dtype=np.float64))
+                if dist < best_dist:
+                    best, best_dist = begin, dist
+
+            best_dist /= motif.length**0.5
+            if best is not None and best_dist <= eta * motif.distance:
+                confirmed.append((best, motif, best_dist))
+        return confirmed
@@ -6,9 +6,23 @@ be filtered for length and ranked using different strategies.
 """
 
 import heapq
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+from warnings import warn
 
+import numpy as np
+
+from . import serialize
+from .cache import Cache, fingerprint, make_key
+from .estimate import estimate
+from .partition import PartitionMiner
 from .patterns import PatternMiner
-from .preprocessing import sax, standardise
+from .preprocessing import reduce_runs, sax, standardise
+from .stats import Stats, stage
+from .storage import FlatDataset
+from .transform import transform
+from .windows import locate, split, window_origins
 
 
 class Miner:
@@ -32,15 +46,102 @@ class Miner:
         Degree of differencing applied before discretisation.
     k : int, optional
         Number of motifs to return. If 0, all motifs are returned.
+    partitions : int, optional
+        Number of shards to mine separately before verifying global support.
+    processes : int, optional
+        Number of worker processes used to mine shards. If 0, shards are mined sequentially.
+    dtype : dtype, optional
+        Floating point type used for mapping, e.g. np.float32 to halve memory use.
+        If None, it is inferred from the data. Distances are accumulated in float64.
+    stats : bool, optional
+        Whether to record timings and counts of each stage in a Stats object.
+    callback : callable, optional
+        Called with the name of a stage and the Stats object whenever a stage finishes.
+        Implies stats.
+    time_budget : float, optional
+        Seconds mine may take. Half is reserved for mapping; when mining patterns
+        runs out of its half, longer patterns are not mined. When mapping runs out,
+        the top k motifs mapped so far are returned.
+    memory_budget : int, optional
+        Approximate bytes the pattern tree may hold. Minsup is raised while mining
+        to stay within it. Ignored if partitions > 1.
+    checkpoint : str, optional
+        File to save the state of mining patterns to after each level, so a run
+        can be resumed with mine(ts, resume_from=checkpoint). Ignored if partitions > 1.
+    cache : str or Cache, optional
+        Directory of an on-disk cache of discretised sequences, pattern trees and
+        motifs, so mining the same time series again reuses earlier results.
+    max_occurrences : int, optional
+        Number of occurrences of a pattern above which a sample of them, stratified by
+        time series, is used to map it. Motif.sampling_error gives the standard error
+        of the representative. If 0, all occurrences are used.
+    seed : int, optional
+        Seed for sampling occurrences.
+    window : int, optional
+        Length of windows to split time series into, a multiple of seglen. Windows
+        are mined as separate time series, so minsup is the fraction of windows a
+        motif should occur in, and Motif.locations gives its best matches in the
+        original time series. Meant for mining a few long time series.
+    step : int, optional
+        Distance between the starts of consecutive windows, a multiple of seglen.
+        If None, windows overlap by half.
+    runs : bool, optional
+        Whether to collapse runs of the same symbol in the discretised sequences
+        before mining (numerosity reduction), which shrinks the sequences of smooth
+        time series. Occurrences are mapped back to the original segments, and each
+        motif covers the typical number of segments of its occurrences, Motif.span.
+        Not supported with window or multichannel time series.
 
     Attributes
     ----------
     motifs : list
         Constructed motifs ordered by the distances to their occurrences.
+    frequent : dict
+        Tree of frequent patterns of the last run, keyed by pattern.
+    stats : Stats
+        Statistics of the last run, if recorded.
+    partial : bool
+        Whether the last run was cut short by the time budget.
+    effective_minsup : float
+        Minimum support used in the last run, raised from minsup to stay within the
+        memory budget.
+    cooccurring : list
+        For multichannel time series, pairs of motifs in different channels whose
+        best matches overlap in at least a fraction minsup of the time series, with
+        that fraction.
+
+    Time series with multiple channels, given as arrays of shape (channels, length),
+    are mined in one pass. Each channel is discretised to its own alphabet, so every
+    pattern and motif belongs to one channel, given by Motif.channel.
+
+    Each call of mine keeps its state in its own Run and only sets the attributes
+    above when it finishes, so one Miner can mine several databases concurrently.
     """
 
     def __init__(
-        self, minsup, seglen, alpha, omax=0.8, mass=False, eta=1.0, diff=0, k=0
+        self,
+        minsup,
+        seglen,
+        alpha,
+        omax=0.8,
+        mass=False,
+        eta=1.0,
+        diff=0,
+        k=0,
+        partitions=1,
+        processes=0,
+        dtype=None,
+        stats=False,
+        callback=None,
+        time_budget=None,
+        memory_budget=None,
+        checkpoint=None,
+        cache=None,
+        max_occurrences=0,
+        seed=0,
+        window=None,
+        step=None,
+        runs=False,
     ):
         self.minsup = minsup
         self.seglen = seglen
@@ -50,51 +151,538 @@ class Miner:
         self.eta = eta
         self.diff = diff
         self.k = k
+        self.partitions = partitions
+        self.processes = processes
+        self.dtype = dtype
+        self.callback = callback
+        self.time_budget = time_budget
+        self.memory_budget = memory_budget
+        self.checkpoint = checkpoint
+        self.cache = Cache(cache) if isinstance(cache, str) else cache
+        self.max_occurrences = max_occurrences
+        self.seed = seed
+        self.window = window
+        self.step = step
+        self.runs = runs
+        if window is not None and step is None:
+            self.step = window // 2 // seglen * seglen or window
 
         self.motifs = []
+        self.frequent = {}
+        self.stats = Stats(callback) if stats or callback else None
+        self.partial = False
+        self.effective_minsup = minsup
+        self.cooccurring = []
 
-    def mine(self, ts):
+    def mine(self, ts, resume_from=None):
         """Perform all steps in motif mining pipeline.
 
         Parameters
         ----------
-        ts : list
+        ts : list or FlatDataset
             Database of time series.
+        resume_from : str, optional
+            Checkpoint file to resume mining patterns from.
+
+        Returns
+        -------
+        res: list
+            frequent motifs.
+        """
+        for motifs in self.iter_mine(ts, batch=0, resume_from=resume_from):
+            pass
+        return motifs
+
+    def mine_many(self, datasets, max_workers=None):
+        """Mine several databases of time series concurrently on a pool of threads.
+
+        Parameters
+        ----------
+        datasets : iterable
+            Databases of time series.
+        max_workers : int, optional
+            Number of threads. If None, the default of ThreadPoolExecutor is used.
+
+        Returns
+        -------
+        res: list
+            frequent motifs of each database.
+        """
+        with ThreadPoolExecutor(max_workers) as executor:
+            return list(executor.map(self.mine, datasets))
+
+    def iter_mine(self, ts, batch=100, resume_from=None):
+        """Perform all steps in motif mining pipeline, yielding intermediate results.
+
+        Patterns are mapped from most to least promising, so the top k motifs
+        improve quickly and iteration can be stopped once they are good enough.
+
+        Parameters
+        ----------
+        ts : list or FlatDataset
+            Database of time series.
+        batch : int, optional
+            Number of patterns to map between results. If 0, only the final result
+            is yielded.
+        resume_from : str, optional
+            Checkpoint file to resume mining patterns from.
+
+        Yields
+        ------
+        res: list
+            frequent motifs mapped so far, the last result being the one of mine.
+        """
+        run = self.start(count_channels(ts))
+        origins = None
+        if self.runs and (run.channels > 1 or self.window is not None):
+            raise ValueError("Runs are not collapsed for windows or multiple channels")
+        if self.window is not None:
+            if run.channels > 1:
+                raise ValueError(
+                    "Windows of multichannel time series are not supported"
+                )
+            origins = window_origins(
+                [len(series) for series in ts], self.window, self.step, self.seglen
+            )
+
+        keys = self.cache_keys(ts) if self.cache is not None else None
+        if keys is not None:
+            cached = self.cache.load_motifs(keys["motifs"])
+            if cached is not None:
+                run.frequent, run.motifs = cached
+                standardised = self.standardise(ts)
+                if origins is not None:
+                    standardised = split(standardised, origins, self.window)
+                    locate(run.motifs, origins)
+                # Attach the time series, so motifs can look for more matches
+                for motif in run.motifs:
+                    motif._ts = standardised
+                    if run.channels > 1:
+                        motif._ts = standardised[motif.channel]
+                self.cooccur(run, standardised)
+                self.publish(run)
+                yield run.motifs if not self.k else run.motifs[: self.k]
+                return
+
+        frequent = None
+        if keys is not None and resume_from is None:
+            frequent = self.cache.load_tree(keys["tree"])
+
+        with stage(run.stats, "sax"):
+            # Positions of runs are needed to map back a cached tree too
+            if frequent is None or self.runs:
+                discretised = self.discretise(ts, keys)
+            if self.runs:
+                discretised, positions = reduce_runs(discretised)
+            standardised = self.standardise(ts)
+            if origins is not None:
+                if frequent is None:
+                    discretised = split(discretised, origins, self.window, self.seglen)
+                standardised = split(standardised, origins, self.window)
+        if frequent is None:
+            patterns = self.mine_patterns(discretised, resume_from, run)
+            # Trees of runs cut short or with raised minsup are incomplete
+            complete = not run.partial and run.effective_minsup == self.minsup
+            if keys is not None and complete:
+                self.cache.save_tree(keys["tree"], run.frequent)
+        else:
+            run.frequent = frequent
+            patterns = order(frequent)
+        if self.runs:
+            expand(run.frequent, positions)
+
+        with stage(run.stats, "map"):
+            for motifs in self.iter_map(standardised, patterns, run, batch):
+                if origins is not None:
+                    locate(motifs if not self.k else motifs[: self.k], origins)
+                self.publish(run)
+                yield motifs if not self.k else motifs[: self.k]
+        if run.channels > 1:
+            self.cooccur(run, standardised)
+            self.publish(run)
+        if keys is not None and not run.partial:
+            self.cache.save_motifs(keys["motifs"], run.motifs, run.frequent)
+
+    def start(self, channels=1):
+        """Start a run of the mining pipeline with its own state."""
+        stats = Stats(self.callback) if self.stats is not None else None
+        deadline = None
+        if self.time_budget is not None:
+            deadline = perf_counter() + self.time_budget
+        return Run(self.minsup, stats, deadline, channels)
+
+    def cooccur(self, run, standardised):
+        """Find co-occurring top motifs of a run on multichannel time series."""
+        if run.channels > 1:
+            top = run.motifs if not self.k else run.motifs[: self.k]
+            run.cooccurring = cooccurring(top, len(standardised[0]), self.minsup)
+
+    def publish(self, run):
+        """Set the state of a run as the state of the last run."""
+        self.motifs = run.motifs
+        self.frequent = run.frequent
+        self.stats = run.stats
+        self.partial = run.partial
+        self.effective_minsup = run.effective_minsup
+        self.cooccurring = run.cooccurring
+
+    def cache_keys(self, ts):
+        """Get cache keys of the results of each stage."""
+        sax = (fingerprint(ts), self.seglen, self.alpha, self.diff)
+        tree = sax + (self.minsup, self.omax)
+        if self.window is not None:
+            tree += (self.window, self.step)
+        if self.runs:
+            tree += ("runs",)
+        motifs = tree + (self.k, self.mass, self.eta, str(self.dtype))
+        motifs += (self.max_occurrences, self.seed)
+        return {
+            "sax": make_key("sax", *sax),
+            "tree": make_key("tree", *tree),
+            "motifs": make_key("motifs", *motifs),
+        }
+
+    def discretise(self, ts, keys=None):
+        """Discretise time series to sequences with SAX, using the cache if keys are given."""
+        if isinstance(ts, FlatDataset):
+            # Flat datasets keep their own copy of the sequences
+            return ts.sax(self.seglen, self.alpha, self.diff)
+        if keys is not None:
+            sequences = self.cache.load_sequences(keys["sax"])
+            if sequences is not None:
+                return sequences
+
+        channels = count_channels(ts)
+        if channels > 1:
+            ts = flatten(ts)
+        sequences = sax(ts, self.seglen, self.alpha, self.diff, channels)
+        if keys is not None:
+            self.cache.save_sequences(keys["sax"], sequences)
+        return sequences
+
+    def standardise(self, ts):
+        """Standardise time series to map patterns on, per channel if there are multiple."""
+        if isinstance(ts, FlatDataset):
+            return ts.standardised(self.dtype)
+        channels = count_channels(ts)
+        if channels == 1:
+            return standardise(ts, self.dtype)
+        standardised = standardise(flatten(ts), self.dtype)
+        return [standardised[c::channels] for c in range(channels)]
+
+    def remap(self, ts, frequent):
+        """Map a tree of frequent patterns to motifs without mining it again.
+
+        Parameters
+        ----------
+        ts : list or FlatDataset
+            Database of time series the patterns were mined from.
+        frequent : dict
+            Tree of frequent patterns, e.g. loaded with frm.serialize.load.
 
         Returns
         -------
         res: list
             frequent motifs.
         """
-        discretised = sax(ts, self.seglen, self.alpha, self.diff)
-        patterns = self.mine_patterns(discretised)
-        self.map_patterns(standardise(ts), patterns)
+        run = self.start(count_channels(ts))
+        run.frequent = frequent
+        self.map_patterns(self.standardise(ts), order(frequent), run)
+        return run.motifs if not self.k else run.motifs[: self.k]
+
+    def save(self, path):
+        """Save the tree of frequent patterns and motifs of the last run, see frm.serialize."""
+        serialize.save(path, self.frequent, self.motifs)
+
+    def transform(self, ts, max_workers=None, max_bytes=2**28):
+        """Compute distances from time series to the motifs of the last run, see frm.transform.
 
-        return self.motifs if not self.k else self.motifs[: self.k]
+        Parameters
+        ----------
+        ts : list
+            Database of time series, e.g. new time series to use motifs as features for.
+        max_workers : int, optional
+            Number of threads. If None, the number of CPUs is used.
+        max_bytes : int, optional
+            Approximate bytes of intermediate arrays held at once.
 
-    def mine_patterns(self, ds):
+        Returns
+        -------
+        distances : ndarray
+            Array of shape (n_series, n_motifs) with the minimum z-normalised distance
+            from each time series to each motif.
+        """
+        return transform(ts, self.motifs, max_workers, max_bytes)
+
+    def estimate(self, ts, budget=None, strict=False):
+        """Estimate the cost of mining without mining, see frm.estimate.
+
+        Parameters
+        ----------
+        ts : list or FlatDataset
+            Database of time series.
+        budget : int, optional
+            Memory budget in bytes to check the estimated peak against.
+        strict : bool, optional
+            Whether to raise a MemoryError instead of warning if the budget is exceeded.
+
+        Returns
+        -------
+        estimate : dict
+            Estimated candidates, occurrences, memory and values read while mapping per
+            level, and peak memory.
+        """
+        minsup = self.minsup / count_channels(ts)
+        sequences = self.discretise(ts)
+        if self.runs:
+            sequences = reduce_runs(sequences)[0]
+        if self.window is not None:
+            # Windows are mined as separate sequences
+            origins = window_origins(
+                [len(series) for series in ts], self.window, self.step, self.seglen
+            )
+            sequences = split(sequences, origins, self.window, self.seglen)
+        res = estimate(sequences, minsup, self.seglen)
+
+        if budget is not None and (res["peak_nbytes"] > budget or res["truncated"]):
+            msg = f"Estimated peak memory {res['peak_nbytes']:.3g} exceeds {budget:.3g} bytes"
+            if strict:
+                raise MemoryError(msg)
+            warn(msg, ResourceWarning)
+
+        return res
+
+    def mine_patterns(self, ds, resume_from=None, run=None):
         """Find frequent patterns in the sequences.
 
         Parameters
         ----------
         sequences : list
             Collection of time series discretised to sequences.
+        resume_from : str, optional
+            Checkpoint file to resume mining from.
+        run : Run, optional
+            State of the run to mine patterns in. If None, a new run is started.
         """
-        pm = PatternMiner(self.minsup, self.omax)
-        pm.mine(ds)
-        return list(pm.frequent.values())
+        if run is None:
+            run = self.start()
+
+        # Patterns of a channel can only occur in its own sequences
+        minsup = self.minsup / run.channels
+        if self.partitions > 1:
+            pm = PartitionMiner(
+                minsup, self.omax, self.partitions, self.processes, run.stats
+            )
+            pm.mine(ds)
+        else:
+            deadline = None
+            if run.deadline is not None:
+                deadline = run.deadline - self.time_budget / 2
+            pm = PatternMiner(
+                minsup,
+                self.omax,
+                run.stats,
+                memory_budget=self.memory_budget,
+                deadline=deadline,
+                checkpoint=self.checkpoint,
+            )
+            pm.mine(ds, resume_from)
+        run.partial = pm.partial
+        if pm.effective_minsup != minsup:
+            run.effective_minsup = pm.effective_minsup * run.channels
+        if run.channels > 1:
+            regroup(pm.frequent, run.channels)
+        run.frequent = pm.frequent
+        return order(pm.frequent)
+
+    def map_patterns(self, ts, patterns, run=None):
+        """Map patterns back to motifs, as the last run if no run is given."""
+        if run is None:
+            run = self.start()
+        for _ in self.iter_map(ts, patterns, run):
+            pass
+        self.publish(run)
 
-    def map_patterns(self, ts, patterns):
-        """Map patterns back to motifs."""
+    def iter_map(self, ts, patterns, run, batch=0):
+        """Map patterns back to motifs, yielding the motifs after each batch."""
+        heap = []
         max_dist = float("inf")
-        for pattern in patterns:
-            pattern.map(ts, self.seglen, max_dist)
-            if self.k == 0 or len(self.motifs) < self.k:
-                heapq.heappush(self.motifs, (-pattern.distance, pattern))
-            else:
-                heapq.heappushpop(self.motifs, (-pattern.distance, pattern))
-                max_dist = -self.motifs[0][0]
-        self.motifs = [m for d, m in sorted(self.motifs, reverse=True)]
+        for i, pattern in enumerate(patterns, 1):
+            if run.out_of_time():
+                break
+            pattern.channel = (ord(pattern.pattern[0]) - ord("a")) // self.alpha
+            data = ts[pattern.channel] if run.channels > 1 else ts
+            mapped = pattern.map(
+                data, self.seglen, max_dist, self.max_occurrences, self.seed
+            )
+            if run.stats is not None:
+                run.stats.mapped += mapped
+                run.stats.abandoned += not mapped
+                run.stats.sampled += pattern.sampled < pattern.occurrences
+            if mapped:
+                if self.k == 0 or len(heap) < self.k:
+                    heapq.heappush(heap, (-pattern.distance, pattern))
+                else:
+                    heapq.heappushpop(heap, (-pattern.distance, pattern))
+                if len(heap) == self.k:
+                    max_dist = -heap[0][0]
+            if batch and not i % batch:
+                run.motifs = [m for d, m in sorted(heap, reverse=True)]
+                yield run.motifs
+        run.motifs = [m for d, m in sorted(heap, reverse=True)]
         if self.mass:
-            for motif in self.motifs[: self.k]:
+            for motif in run.motifs[: self.k]:
+                if run.out_of_time():
+                    break
                 motif.get_more_matches(self.eta)
+        yield run.motifs
+
+
+class Run:
+    """State of one run of the mining pipeline.
+
+    Parameters
+    ----------
+    minsup : float
+        Fraction of time series a motif should occur in.
+    stats : Stats, optional
+        Statistics to record the run in.
+    deadline : float, optional
+        Value of time.perf_counter after which the run is cut short.
+    channels : int, optional
+        Number of channels of the time series.
+
+    Attributes
+    ----------
+    motifs : list
+        Constructed motifs ordered by the distances to their occurrences.
+    frequent : dict
+        Tree of frequent patterns, keyed by pattern.
+    partial : bool
+        Whether the run was cut short.
+    effective_minsup : float
+        Minimum support used, raised from minsup to stay within the memory budget.
+    cooccurring : list
+        Pairs of motifs in different channels that occur together, with their support.
+    """
+
+    def __init__(self, minsup, stats=None, deadline=None, channels=1):
+        self.stats = stats
+        self.deadline = deadline
+        self.channels = channels
+        self.cooccurring = []
+        self.motifs = []
+        self.frequent = {}
+        self.partial = False
+        self.effective_minsup = minsup
+
+    def out_of_time(self):
+        """Check if the deadline has passed, marking the run as partial."""
+        if self.deadline is None or perf_counter() <= self.deadline:
+            return False
+        self.partial = True
+        return True
+
+
+def order(frequent):
+    """Order patterns from most to least promising.
+
+    Patterns that occur in many time series and are long tend to be the best motifs.
+    """
+    return sorted(
+        frequent.values(), key=lambda m: (m.support, len(m.pattern)), reverse=True
+    )
+
+
+def count_channels(ts):
+    """Get number of channels of a database of time series."""
+    if isinstance(ts, FlatDataset) or not len(ts) or np.ndim(ts[0]) != 2:
+        return 1
+    return len(ts[0])
+
+
+def flatten(ts):
+    """Interleave channels of multichannel time series into one database of time series.
+
+    Channel c of time series i is at index i * channels + c.
+    """
+    if isinstance(ts, np.ndarray):
+        return ts.reshape(-1, ts.shape[-1])
+    return [np.asarray(channel) for series in ts for channel in series]
+
+
+def regroup(frequent, channels):
+    """Key occurrences of patterns in interleaved sequences by time series instead."""
+    seen = set()
+    stack = list(frequent.values())
+    while stack:
+        motif = stack.pop()
+        if motif.pattern in seen:
+            continue
+        seen.add(motif.pattern)
+        indexes = motif.indexes
+        motif.indexes = defaultdict(list)
+        for seq, idx in indexes.items():
+            motif.indexes[seq // channels] = idx
+        stack += motif.children
+
+
+def expand(frequent, positions):
+    """Translate occurrences in sequences with collapsed runs back to segment positions.
+
+    Sets the span of each pattern to the median number of segments covered by the runs
+    of its occurrences, or by those of its children if it has none of its own.
+    """
+    motifs = {}
+    stack = list(frequent.values())
+    while stack:
+        motif = stack.pop()
+        if motif.pattern not in motifs:
+            motifs[motif.pattern] = motif
+            stack += motif.children
+
+    # Spans depend on occurrences of children, so all are computed before translating
+    for motif in motifs.values():
+        n = len(motif.pattern)
+        spans = [
+            positions[seq][np.add(idx, n)] - positions[seq][idx]
+            for seq, idx in (motif.indexes or motif.get_all_indexes()).items()
+        ]
+        motif.span = int(np.median(np.concatenate(spans))) if spans else n
+    for motif in motifs.values():
+        motif.indexes = defaultdict(
+            list,
+            {seq: positions[seq][idx].tolist() for seq, idx in motif.indexes.items()},
+        )
+
+
+def cooccurring(motifs, n, minsup):
+    """Find pairs of motifs in different channels whose best matches overlap.
+
+    Parameters
+    ----------
+    motifs : list
+        Mapped motifs of multichannel time series.
+    n : int
+        Number of time series.
+    minsup : float
+        Fraction of time series in which best matches of both motifs should overlap.
+
+    Returns
+    -------
+    pairs : list
+        Tuples of two motifs and the fraction of time series in which they overlap.
+    """
+    pairs = []
+    for i, a in enumerate(motifs):
+        for b in motifs[i + 1 :]:
+            if a.channel == b.channel:
+                continue
+            overlap = sum(
+                a.best_matches[s] < b.best_matches[s] + b.length
+                and b.best_matches[s] < a.best_matches[s] + a.length
+                for s in a.best_matches.keys() & b.best_matches.keys()
+            )
+            if overlap and overlap >= minsup * n:
+                pairs.append((a, b, overlap / n))
+    return pairs
@@ -1,13 +1,22 @@
 from collections import defaultdict
 from functools import partial
+from itertools import islice
 from warnings import catch_warnings, simplefilter
+from zlib import crc32
 
 import numpy as np
-from scipy.stats import zscore
 
-with catch_warnings():
-    simplefilter("ignore")
-    from mass_ts import mass2 as mass
+from .kernels import best_match
+from .preprocessing import zscore
+
+# Approximate sizes in bytes on 64-bit CPython of a pattern with its tree and
+# index structures, of each sequence in its indexes, and of each occurrence
+MOTIF_BYTES = 700
+SEQUENCE_BYTES = 121
+OCCURRENCE_BYTES = 37
+
+# Number of occurrences stacked at once when averaging or matching them
+CHUNK = 1024
 
 
 class Motif:
@@ -20,8 +29,16 @@ class Motif:
         self.best_matches = {}
         self.distance = 0.0
         self.length = 0
+        self.channel = 0
+        self.span = 0
+        self.support = 0
+        self.locations = []
+        self.occurrences = 0
+        self.sampled = 0
+        self.sampling_error = 0.0
         self._seglen = 0
         self._ts = []
+        self._occurrences = {}
 
     def __repr__(self):
         return f"Motif('{self.pattern}')"
@@ -50,6 +67,24 @@ class Motif:
         if not len(self.indexes[i]):
             self.indexes.pop(i, 0)
 
+    def nbytes(self):
+        """Estimate memory held by pattern and its own occurrences."""
+        occurrences = sum(len(indexes) for indexes in self.indexes.values())
+        return (
+            MOTIF_BYTES
+            + len(self.pattern)
+            + len(self.indexes) * SEQUENCE_BYTES
+            + occurrences * OCCURRENCE_BYTES
+        )
+
+    def segments(self):
+        """Get number of segments an occurrence covers.
+
+        This is the length of the pattern, unless it was mined from sequences with
+        runs of symbols collapsed, in which case span is the typical length of its runs.
+        """
+        return self.span or len(self.pattern)
+
     def get_all_indexes(self):
         """Get dict of all indexes of motif, including its children."""
         indexes = defaultdict(list)
@@ -63,59 +98,107 @@ class Motif:
 
         return indexes
 
-    def map(self, ts, seglen, max_dist):
-        """Map representative, matches, and distance using occurrences."""
+    def map(self, ts, seglen, max_dist, max_occurrences=0, seed=0):
+        """Map representative, matches, and distance using occurrences.
+
+        If the pattern has more than max_occurrences occurrences, a sample of them is used.
+        Returns False if mapping was abandoned because the distance exceeds max_dist.
+        """
         self._seglen = seglen
         self._ts = ts
-        self.length = len(self.pattern) * self._seglen
+        self.length = self.segments() * self._seglen
+        self.best_matches = {}
+        self.distance = 0.0
+        self._occurrences = self.sample_indexes(max_occurrences, seed)
 
         self.set_representative()
         self.set_best_matches()
-        if len(self.pattern) >= 3:
+        self._occurrences = {}
+        if self.segments() >= 3:
             self.trim_length()
-        self.set_distance(max_dist)
+        else:
+            # Best matches are found per segment, trimming converts them to positions
+            for ts_index, start_index in self.best_matches.items():
+                self.best_matches[ts_index] = start_index * self._seglen
+        return self.set_distance(max_dist)
+
+    def sample_indexes(self, max_occurrences=0, seed=0):
+        """Sample about max_occurrences occurrences, stratified by sequence.
+
+        Every sequence keeps at least one occurrence, and the others are divided
+        in proportion to its number of occurrences. The sample only depends on the
+        seed and the pattern, not on the order in which patterns are mapped.
+        """
+        indexes = self.get_all_indexes()
+        total = sum(len(starts) for starts in indexes.values())
+        self.sampled = self.occurrences = total
+        if not max_occurrences or total <= max_occurrences:
+            return indexes
+
+        rng = np.random.default_rng([seed, crc32(self.pattern.encode())])
+        sample = {}
+        for seq, starts in indexes.items():
+            quota = max(1, max_occurrences * len(starts) // total)
+            if quota < len(starts):
+                starts = sorted(rng.choice(starts, quota, replace=False).tolist())
+            sample[seq] = starts
+        self.sampled = sum(len(starts) for starts in sample.values())
+        return sample
 
     def set_representative(self):
         """Set representative motif as stepwise average of occurrences."""
-        with catch_warnings():
-            simplefilter("ignore")
-            average_occurrences = [
-                np.nanmean(
-                    [
-                        self.get_occurrence(ts_index, start_index)
-                        for ts_index, start_indexes in self.get_all_indexes().items()
-                        for start_index in start_indexes
-                    ],
-                    axis=0,
-                )
-            ]
-            self.representative = np.nanmean(average_occurrences, axis=0)
+        indexes = self._occurrences or self.get_all_indexes()
+        occurrences = (
+            self.get_occurrence(ts_index, start_index)
+            for ts_index, start_indexes in indexes.items()
+            for start_index in start_indexes
+        )
+        self.representative, count, sq_sum = accumulate(occurrences)
+        self.sampling_error = self.get_sampling_error(
+            self.representative, count, sq_sum
+        )
         self.representative = znorm(self.representative[~np.isnan(self.representative)])
         self.length = len(self.representative)
 
+    def get_sampling_error(self, mean, count, sq_sum):
+        """Estimate root mean square standard error of the average of sampled occurrences."""
+        if count.max(initial=0) >= self.occurrences:
+            return 0.0
+        # Standard error of a sample without replacement from all occurrences
+        with np.errstate(divide="ignore", invalid="ignore"):
+            var = np.maximum(sq_sum - count * mean**2, 0) / (count - 1)
+            var = var / count * (1 - count / self.occurrences)
+        var = var[np.isfinite(var)]
+        return float(np.sqrt(var.mean())) if var.size else 0.0
+
     def set_best_matches(self):
         """Select best matches to representative motif."""
-        for ts_index, start_indexes in self.get_all_indexes().items():
-            min_dist = np.inf
-            for start_index in start_indexes:
-                occ = znorm(self.get_occurrence(ts_index, start_index))
-                dist = ED(self.representative, occ)
-                if dist < min_dist:
-                    min_dist = dist
-                    self.best_matches[ts_index] = start_index
+        indexes = self._occurrences or self.get_all_indexes()
+        for ts_index, start_indexes in indexes.items():
+            # Only the occurrences are read, in the data type of the time series
+            occurrences = (
+                self.get_occurrence(ts_index, start) for start in start_indexes
+            )
+            best = closest(occurrences, self.representative)[0]
+            self.best_matches[ts_index] = start_indexes[best]
 
     def trim_length(self):
         """Trim length of occurrences if beneficial."""
+        # Occurrences of patterns with a span can run past the end of a time series
         occurrences = np.array(
             [
-                zscore(self._ts[ts_index][start_index : start_index + self.length])
+                self.pad(
+                    zscore(self._ts[ts_index][start_index : start_index + self.length])
+                )
                 for ts_index, start_index in self.best_matches.items()
             ]
         )
 
         # Find stable begin and end points of occurrences
-        diff = np.max(occurrences, axis=0) - np.min(occurrences, axis=0)
-        reference = np.mean(diff[self._seglen : -self._seglen])
+        with catch_warnings():
+            simplefilter("ignore")
+            diff = np.nanmax(occurrences, axis=0) - np.nanmin(occurrences, axis=0)
+            reference = np.nanmean(diff[self._seglen : -self._seglen])
         left_trim = np.where(diff[: self._seglen] > reference)[0]
         left_trim = left_trim[-1] if left_trim.size > 0 else 0
         right_trim = np.where(diff[-self._seglen :] > reference)[0]
@@ -124,31 +207,29 @@ class Motif:
         # Apply left and right trim
         for ts_index, start_index in self.best_matches.items():
             self.best_matches[ts_index] = (start_index * self._seglen) + left_trim
-        self.length = len(self.pattern) * self._seglen - left_trim - right_trim
+        self.length = self.segments() * self._seglen - left_trim - right_trim
 
     def set_distance(self, max_dist):
-        """Calculate distance."""
+        """Calculate distance, abandoning as soon as it exceeds max_dist."""
         # Recalculate representative
-        self.representative = znorm(
-            np.nanmean(
-                [
-                    self.pad(
-                        znorm(
-                            self._ts[ts_index][start_index : start_index + self.length]
-                        )
-                    )
-                    for ts_index, start_index in self.best_matches.items()
-                ],
-                axis=0,
-            )
+        occurrences = (
+            self.pad(znorm(self._ts[ts_index][start_index : start_index + self.length]))
+            for ts_index, start_index in self.best_matches.items()
         )
+        self.representative = znorm(accumulate(occurrences)[0])
 
         # Calculate NAED
+        norm = (len(self.best_matches)) * (self.length) ** (0.5)
         for ts_index, start in self.best_matches.items():
             occ = self.pad(znorm(self._ts[ts_index][start : start + self.length]))
-            self.distance += np.nansum((occ - self.representative) ** 2) ** 0.5
+            dist = np.nansum((occ - self.representative) ** 2, dtype=np.float64)
+            self.distance += dist**0.5
+            if self.distance > max_dist * norm:
+                self.distance = np.inf
+                return False
 
-        self.distance /= (len(self.best_matches)) * (self.length) ** (0.5)
+        self.distance /= norm
+        return True
 
     def get_occurrence(self, ts_index, start_index):
         """Get occurrence from time series with padding if needed."""
@@ -159,8 +240,10 @@ class Motif:
 
     def pad(self, ts):
         """Ensure occurrences are all the same length."""
+        ts = np.asarray(ts)
         short = self.length - len(ts)
-        return np.hstack((ts, np.array(short * [np.nan])))
+        nan = np.full(short, np.nan, dtype=np.result_type(ts.dtype, np.float32))
+        return np.hstack((ts, nan))
 
     def get_more_matches(self, eta):
         """Find matches in time series without matches if radius is not too high."""
@@ -170,7 +253,10 @@ class Motif:
             if i not in self.best_matches:
                 with catch_warnings():
                     simplefilter("ignore")
-                    m = mass(self._ts[i], self.representative)
+                    # Imported here, as importing mass_ts is slow
+                    from mass_ts import mass2 as mass
+
+                    m = mass(np.asarray(series), self.representative)
 
                 best = np.argmin(m)
                 radius = 0
@@ -187,9 +273,78 @@ class Motif:
         self.distance = new_distance
 
 
+def set_supports(motifs):
+    """Set the number of sequences each motif or one of its children occurs in.
+
+    motifs must include all children of each motif. Children are longer than
+    their parents, so motifs are visited from long to short and the sequences of
+    each child are merged into those of its parent.
+    """
+    sequences = {}
+    for motif in sorted(motifs, key=lambda m: len(m.pattern), reverse=True):
+        seqs = set(motif.indexes)
+        for child in motif.children:
+            seqs |= sequences.pop(child.pattern)
+        sequences[motif.pattern] = seqs
+        motif.support = len(seqs)
+
+
+def accumulate(occurrences, chunk=CHUNK):
+    """Average equally long occurrences stepwise, stacking a chunk of them at a time.
+
+    Returns
+    -------
+    mean : ndarray
+        Stepwise average of occurrences ignoring NaN, NaN where all are NaN.
+    count : ndarray
+        Number of values that are not NaN per step.
+    sq_sum : ndarray
+        Sum of squares of values that are not NaN per step.
+    """
+    occurrences = iter(occurrences)
+    total = count = sq_sum = None
+    dtype = np.float64
+    while block := list(islice(occurrences, chunk)):
+        block = np.array(block)
+        if total is None:
+            dtype = block.dtype
+            total = np.zeros(block.shape[1], dtype=np.float64)
+            sq_sum = np.zeros(block.shape[1], dtype=np.float64)
+            count = np.zeros(block.shape[1], dtype=np.int64)
+        total += np.nansum(block, axis=0, dtype=np.float64)
+        sq_sum += np.nansum(np.square(block, dtype=np.float64), axis=0)
+        count += np.sum(~np.isnan(block), axis=0)
+    if total is None:
+        return np.zeros(0, dtype=dtype), np.zeros(0, dtype=np.int64), np.zeros(0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = total / count
+    return mean.astype(dtype), count, sq_sum
+
+
+def closest(occurrences, representative, chunk=CHUNK):
+    """Find the occurrence closest to a representative, stacking a chunk of them at a time.
+
+    Returns
+    -------
+    index : int
+        Position of the closest occurrence, the first one if there are several.
+    distance : float
+        Its distance to the representative, see frm.kernels.best_match.
+    """
+    occurrences = iter(occurrences)
+    best, min_dist = 0, np.inf
+    offset = 0
+    while block := list(islice(occurrences, chunk)):
+        index, dist = best_match(np.array(block), representative)
+        if dist < min_dist:
+            best, min_dist = offset + index, dist
+        offset += len(block)
+    return best, min_dist
+
+
 def ED(a, b):
     """Euclidean distance. Note: a and b need to be normalised beforehand."""
-    return np.sqrt(np.nansum(np.square(a - b)))
+    return np.sqrt(np.nansum(np.square(a - b), dtype=np.float64))
 
 
 znorm = partial(zscore, nan_policy="omit")
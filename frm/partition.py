@@ -0,0 +1,159 @@
+"""Partition module.
+
+This module defines the PartitionMiner class, a PatternMiner that mines
+collections of sequences too large to hold in memory at once. Following
+the SON algorithm, the collection is split into shards that are mined
+independently at the proportional local minimum support. Every globally
+frequent pattern is locally frequent in at least one shard, so the union
+of the locally frequent patterns is a complete set of candidates, whose
+global support is counted in one verification pass over the shards.
+
+The shard functions mine_shard and verify_shard only take and return
+plain Python objects, so shards can be processed on separate processes
+or machines. PartitionMiner uses a local multiprocessing pool.
+"""
+
+from collections import Counter, defaultdict
+from multiprocessing import Pool
+
+from .motif import Motif
+from .patterns import PatternMiner
+from .stats import stage
+
+
+class PartitionMiner(PatternMiner):
+    """Mine patterns from a collection of sequences shard by shard.
+
+    Parameters
+    ----------
+    minsup : float
+        The minimum support for a pattern.
+    omax : float
+        The maximum overlap with longer patterns to not be considered redundant.
+    partitions : int
+        Number of shards the collection of sequences is split into.
+    processes : int, optional
+        Number of worker processes. If 0, shards are processed in this process.
+    stats : Stats, optional
+        Statistics to record stage timings in.
+
+    Attributes
+    ----------
+    frequent : dict
+        Dictionary of frequent motifs with string patterns as keys and Motif objects as values.
+    """
+
+    def __init__(self, minsup, omax=0.8, partitions=2, processes=0, stats=None):
+        super().__init__(minsup, omax, stats)
+        self.partitions = partitions
+        self.processes = processes
+
+    def mine(self, sequences):
+        """Mine sequence motifs in two passes over the shards.
+
+        sequences : list
+            Collection of sequences with discrete values.
+        """
+        self._min_freq = len(sequences) * self.minsup
+        shards = list(split(sequences, self.partitions))
+
+        # First pass: locally frequent patterns are the global candidates
+        with stage(self.stats, "patterns"):
+            args = [(shard, self.minsup) for _, shard in shards]
+            candidates = set().union(*self.run(mine_shard, args))
+
+        # Second pass: count global support of candidates
+        with stage(self.stats, "verify"):
+            args = [(shard, offset, candidates) for offset, shard in shards]
+            self.merge(self.run(verify_shard, args))
+
+        with stage(self.stats, "remove_redundant"):
+            self.remove_redundant()
+
+    def run(self, func, args):
+        """Apply func to all shard arguments, in parallel if possible."""
+        if not self.processes:
+            return [func(*arg) for arg in args]
+        with Pool(self.processes) as p:
+            return p.starmap(func, args)
+
+    def merge(self, results):
+        """Build pattern tree from verified shards.
+
+        Each shard assigns its occurrences to the longest candidate starting
+        there. Occurrences of globally infrequent candidates are moved to
+        their longest frequent prefix, after which children are linked to
+        their parents.
+        """
+        support = Counter()
+        for counts, _ in results:
+            support.update(counts)
+        frequent = {p for p, count in support.items() if count >= self._min_freq}
+
+        for _, assigned in results:
+            for pattern, indexes in assigned.items():
+                while pattern and pattern not in frequent:
+                    pattern = pattern[:-1]
+                if not pattern:
+                    continue
+                if pattern not in self.frequent:
+                    self.frequent[pattern] = Motif(pattern)
+                for seq, idx in indexes.items():
+                    self.frequent[pattern].indexes[seq].extend(idx)
+
+        # Patterns whose occurrences all moved to children have no entry yet
+        for pattern in sorted(frequent, key=len):
+            if pattern not in self.frequent:
+                self.frequent[pattern] = Motif(pattern)
+            self.frequent[pattern].support = support[pattern]
+            if len(pattern) > 1:
+                self.frequent[pattern[:-1]].children.append(self.frequent[pattern])
+
+        for motif in self.frequent.values():
+            for idx in motif.indexes.values():
+                idx.sort()
+
+
+def split(sequences, partitions):
+    """Split sequences into contiguous shards, yielding (offset, shard) pairs."""
+    size = -(-len(sequences) // partitions)
+    for offset in range(0, len(sequences), size):
+        yield offset, sequences[offset : offset + size]
+
+
+def mine_shard(sequences, minsup):
+    """Find locally frequent patterns in a shard.
+
+    Redundant patterns are kept, because they may be parents of globally
+    frequent patterns.
+    """
+    pm = PatternMiner(minsup, 1)
+    pm.mine(sequences)
+    return set(pm.frequent)
+
+
+def verify_shard(sequences, offset, candidates):
+    """Count support of candidates in a shard.
+
+    Returns
+    -------
+    counts : Counter
+        Number of sequences in the shard that contain each candidate.
+    assigned : dict
+        Starting indexes, keyed by global sequence index, of the longest
+        candidate starting at each position.
+    """
+    counts = Counter()
+    assigned = defaultdict(lambda: defaultdict(list))
+    for i, sequence in enumerate(sequences, offset):
+        seen = set()
+        for j in range(len(sequence)):
+            # Candidates are prefix-closed, so extend while still a candidate
+            k = 1
+            while j + k <= len(sequence) and sequence[j : j + k] in candidates:
+                seen.add(sequence[j : j + k])
+                k += 1
+            if k > 1:
+                assigned[sequence[j : j + k - 1]][i].append(j)
+        counts.update(seen)
+    return counts, {p: dict(idx) for p, idx in assigned.items()}
@@ -5,7 +5,14 @@ sequences and mines frequent and maximal patterns from it. The patterns
 can be filtered to have a certain minimum length.
 """
 
-from .motif import Motif
+from time import perf_counter
+
+import numpy as np
+
+from .kernels import lcs, redundant
+from .motif import MOTIF_BYTES, OCCURRENCE_BYTES, SEQUENCE_BYTES, Motif
+from .serialize import load_tree, save_tree
+from .stats import stage
 
 
 class PatternMiner:
@@ -17,18 +24,57 @@ class PatternMiner:
         The minimum support for a pattern.
     omax : float
         The maximum overlap with longer patterns to not be considered redundant.
+    stats : Stats, optional
+        Statistics to record candidate counts and stage timings in.
+    max_len : int, optional
+        Maximum length of patterns to mine. If 0, patterns can have any length.
+    memory_budget : int, optional
+        Approximate bytes the patterns and their occurrences may hold. Before each
+        level, minsup is raised until an upper bound on the memory of the level fits.
+        1-patterns are always mined, so the budget should at least hold them.
+    deadline : float, optional
+        Value of time.perf_counter after which no longer patterns are mined.
+    checkpoint : str, optional
+        File to save the state of mining to after each level, to resume from.
 
     Attributes
     ----------
     frequent : dict
         Dictionary of frequent motifs with string patterns as keys and Motif objects as values.
+    nbytes : int
+        Approximate bytes held by patterns and their occurrences. Only accounted
+        if stats are recorded or there is a memory budget, else 0.
+    peak_nbytes : int
+        Maximum of nbytes while mining, reached right before pruning candidates.
+    effective_minsup : float
+        Minimum support after raising it to stay within the memory budget.
+    partial : bool
+        Whether mining stopped at the deadline.
     """
 
-    def __init__(self, minsup, omax=0.8):
+    def __init__(
+        self,
+        minsup,
+        omax=0.8,
+        stats=None,
+        max_len=0,
+        memory_budget=None,
+        deadline=None,
+        checkpoint=None,
+    ):
         self.minsup = minsup
         self.omax = omax
+        self.stats = stats
+        self.max_len = max_len
+        self.memory_budget = memory_budget
+        self.deadline = deadline
+        self.checkpoint = checkpoint
 
         self.frequent = {}
+        self.nbytes = 0
+        self.peak_nbytes = 0
+        self.effective_minsup = minsup
+        self.partial = False
 
         # Frequency is easier to check than support
         self._min_freq = 0
@@ -39,7 +85,10 @@ class PatternMiner:
         # Keep track of the patterns of length k-1 and length k
         self._patterns = [set(), set()]
 
-    def mine(self, sequences):
+        # Number of frequent symbols, which bounds the candidates of a parent
+        self._symbols = 0
+
+    def mine(self, sequences, resume_from=None):
         """Mine sequence motifs.
 
         Starting with patterns of length 1 (1-patterns), candidates are
@@ -48,44 +97,100 @@ class PatternMiner:
 
         sequences : list
             Collection of sequences with discrete values.
+        resume_from : str, optional
+            Checkpoint file to continue mining from after its last completed level.
         """
-        self._min_freq = len(sequences) * self.minsup
+        self._n = len(sequences)
+        self._min_freq = self._n * self.minsup
 
-        # Mine 1-patterns separately from longer patterns
-        self.mine_1_patterns(sequences)
+        with stage(self.stats, "patterns"):
+            if resume_from is not None:
+                self.restore(resume_from)
+            else:
+                # Mine 1-patterns separately from longer patterns
+                self.mine_1_patterns(sequences)
+                self.save()
 
-        # If there were no frequent k-patterns, there can be no frequent (k+1)-patterns
-        while self._patterns[1]:
-            self._patterns = [self._patterns[1], set()]
-            self.generate_candidates_from_parents(sequences)
-            self.prune_infrequent()
-            self._k += 1
-        self.remove_redundant()
+            # If there were no frequent k-patterns, there can be no frequent (k+1)-patterns
+            while self._patterns[1] and (not self.max_len or self._k <= self.max_len):
+                if self.deadline is not None and perf_counter() > self.deadline:
+                    self.partial = True
+                    break
+                self._patterns = [self._patterns[1], set()]
+                if self.memory_budget is not None:
+                    self.fit_budget()
+                self.generate_candidates_from_parents(sequences)
+                self._k += 1
+                self.save()
+
+        with stage(self.stats, "remove_redundant"):
+            self.remove_redundant()
 
     def mine_1_patterns(self, sequences):
         """Make one scan over sequences to find frequent 1-patterns."""
+        self.start_level()
         for i, sequence in enumerate(sequences):
             for j, item in enumerate(sequence):
                 if item not in self.frequent:
                     self.frequent[item] = Motif(item)
-                    self._patterns[1].add(item)
                 self.frequent[item].record_index(i, j)
-        self.prune_infrequent()
+        self.prune_infrequent(list(self.frequent))
+        self._symbols = len(self._patterns[1])
+        self.record_level(1)
+
+    def start_level(self):
+        """Start counting candidates, occurrences and memory of a level."""
+        self._level = {"candidates": 0, "occurrences": 0, "nbytes": self.nbytes}
 
-    def prune_infrequent(self):
-        """Prune infrequent patterns.
+    def record_level(self, k):
+        """Record the counts of a level in the statistics."""
+        if self.stats is not None:
+            kept = len(self._patterns[1])
+            level = self._level
+            self.stats.level(
+                k, level["candidates"], kept, level["occurrences"], level["nbytes"]
+            )
+
+    def prune_infrequent(self, candidates):
+        """Prune infrequent patterns among candidates.
 
         - Prunes patterns with a too low support;
-        - Adds frequent patterns to list of frequent patterns
+        - Adds frequent patterns to the patterns of this level and to their parents
         """
-        for pattern in self._patterns[1].copy():
+        if self.stats is not None:
+            self._level["candidates"] += len(candidates)
+            self._level["occurrences"] += sum(
+                len(indexes)
+                for pattern in candidates
+                for indexes in self.frequent[pattern].indexes.values()
+            )
+
+        # Account for the candidates, memory use is highest before pruning
+        account = self.accounting()
+        if account:
+            nbytes = {p: self.frequent[p].nbytes() for p in candidates}
+            self.nbytes += sum(nbytes.values())
+            self.peak_nbytes = max(self.peak_nbytes, self.nbytes)
+            self._level["nbytes"] = max(self._level["nbytes"], self.nbytes)
+        parents = {}
+
+        for pattern in candidates:
             # Check if pattern occurs in enough time series to comply with minsup
             if len(self.frequent[pattern].indexes) < self._min_freq:
+                if account:
+                    self.nbytes -= nbytes[pattern]
                 self.frequent.pop(pattern)
-                self._patterns[1].discard(pattern)
+                continue
+            self._patterns[1].add(pattern)
+
+            # All occurrences are still the pattern's own, children take them later
+            self.frequent[pattern].support = len(self.frequent[pattern].indexes)
+
             # Reorder the tree for k > 1 patterns
-            elif len(pattern) > 1:
+            if len(pattern) > 1:
                 parent = self.frequent[pattern[:-1]]
+                if account and parent.pattern not in parents:
+                    parents[parent.pattern] = parent.nbytes()
 
                 # Add candidate to parent's children
                 parent.children.append(self.frequent[pattern])
@@ -95,9 +200,114 @@ class PatternMiner:
                     for index in indexes:
                         parent.remove_index(seq, index)
 
+        # Occurrences moved to children no longer take up space in parents
+        for pattern, nbytes in parents.items():
+            self.nbytes += self.frequent[pattern].nbytes() - nbytes
+
+    def accounting(self):
+        """Check if memory held by patterns is accounted for."""
+        return self.stats is not None or self.memory_budget is not None
+
+    def save(self):
+        """Save the state after a completed level to the checkpoint file."""
+        if self.checkpoint is None:
+            return
+        level = [i for i, p in enumerate(self.frequent) if p in self._patterns[1]]
+        save_tree(
+            self.checkpoint,
+            self.frequent,
+            level=np.array(level, dtype=np.int64),
+            k=self._k,
+            min_freq=self._min_freq,
+            n=self._n,
+            minsup=self.minsup,
+            nbytes=self.nbytes,
+            peak_nbytes=self.peak_nbytes,
+        )
+
+    def restore(self, filename):
+        """Restore the state after a completed level from a checkpoint file."""
+        self.frequent, state = load_tree(filename)
+        if state["n"] != self._n or state["minsup"] != self.minsup:
+            raise ValueError(
+                f"{filename} was saved while mining other sequences or another minsup"
+            )
+        patterns = list(self.frequent)
+        self._patterns = [set(), {patterns[i] for i in state["level"]}]
+        self._symbols = sum(len(p) == 1 for p in patterns)
+        self._k = int(state["k"])
+        self._min_freq = float(state["min_freq"])
+        self.effective_minsup = self._min_freq / self._n
+        self.nbytes = int(state["nbytes"])
+        self.peak_nbytes = int(state["peak_nbytes"])
+
+    def fit_budget(self):
+        """Raise minimum frequency so the next level fits in the memory budget.
+
+        The candidates of a parent extend its occurrences, so they are pruned right
+        after they are generated, and only parents that are frequent enough to have
+        frequent children are extended. A level therefore holds at most the current
+        tree, the frequent candidates of all parents and all candidates of one
+        parent, which bounds its memory use:
+
+        - A parent has at most as many candidates as it has occurrences or there are
+          frequent symbols. They hold one index per occurrence, and at most one
+          sequence per occurrence or per parent sequence each;
+        - At most occurrences // min_freq of them are frequent. They take over
+          their occurrences from the parent, so they only add their own overhead
+          and their sequences, at most one per occurrence or parent sequence each.
+
+        The lowest minimum frequency whose bound fits is used. If none does,
+        no parent is extended and mining stops.
+        """
+        parents = [
+            (len(m.indexes), sum(len(idx) for idx in m.indexes.values()))
+            for m in (self.frequent[p] for p in self._patterns[0])
+        ]
+        overhead = MOTIF_BYTES + self._k
+
+        def bound(min_freq):
+            kept = candidates = 0
+            for support, occurrences in parents:
+                if support < min_freq:
+                    continue
+                n = min(occurrences, self._symbols)
+                frequent = min(n, int(occurrences // max(min_freq, 1)))
+                sequences = min(occurrences, frequent * support)
+                kept += frequent * overhead + sequences * SEQUENCE_BYTES
+                nbytes = n * overhead + occurrences * OCCURRENCE_BYTES
+                nbytes += min(occurrences, n * support) * SEQUENCE_BYTES
+                candidates = max(candidates, nbytes)
+            return self.nbytes + kept + candidates
+
+        if bound(self._min_freq) <= self.memory_budget:
+            return
+
+        # The bound decreases as the minimum frequency rises
+        low = int(self._min_freq) + 1
+        high = max((support for support, _ in parents), default=0) + 1
+        while low < high:
+            mid = (low + high) // 2
+            if bound(mid) <= self.memory_budget:
+                high = mid
+            else:
+                low = mid + 1
+        self._min_freq = low
+        self.effective_minsup = self._min_freq / self._n
+
     def generate_candidates_from_parents(self, sequences):
-        """Use frequent k-1 patterns to find k-pattern candidates."""
+        """Use frequent k-1 patterns to find k-pattern candidates.
+
+        All occurrences of a candidate extend occurrences of its parent, so the
+        candidates of each parent are pruned before those of the next are generated.
+        Parents in fewer sequences than the minimum frequency are skipped, as their
+        candidates cannot be frequent.
+        """
+        self.start_level()
         for parent in self._patterns[0]:
+            if len(self.frequent[parent].indexes) < self._min_freq:
+                continue
+            candidates = []
             for seq, indexes in self.frequent[parent].indexes.items():
                 for index in indexes:
                     candidate = sequences[seq][index : index + self._k]
@@ -109,9 +319,11 @@ class PatternMiner:
                     # Keep track of new candidates
                     if candidate not in self.frequent:
                         self.frequent[candidate] = Motif(candidate)
-                        self._patterns[1].add(candidate)
+                        candidates.append(candidate)
 
                     self.frequent[candidate].record_index(seq, index)
+            self.prune_infrequent(candidates)
+        self.record_level(self._k)
 
     def remove_redundant(self):
         """Remove redundant patterns."""
@@ -121,36 +333,15 @@ class PatternMiner:
 
         # Remove patterns with too much overlap
         patterns = sorted(self.frequent, key=len, reverse=True)
-        pruned = set()
-
-        for p1 in patterns:
-            if p1 in pruned:
-                continue
-            for p2 in patterns:
-                n, m = len(p1), len(p2)
-                # Only check unseen patterns and pairs
-                if m >= n or p2 in pruned:
-                    continue
-
-                # Check if shorter pattern consists mostly of lcs
-                if self.lcs(p1, p2, n, m) / m > self.omax:
-                    self.frequent.pop(p2, 0)
-                    pruned.add(p2)
+        for pattern in redundant(patterns, self.omax):
+            motif = self.frequent.pop(pattern)
+            if self.accounting():
+                self.nbytes -= motif.nbytes()
 
     def lcs(self, p1: str, p2: str, n: int, m: int) -> int:
         """Longest common subsequence.
 
-        Find the length of the longest sequence that is contained in two
-        patterns. Uses dynamic programming algorithm adapted from
-        https://www.geeksforgeeks.org/longest-common-subsequence-dp-4/
+        Find the length of the longest sequence that is contained in the first
+        n symbols of p1 and the first m symbols of p2, see frm.kernels.lcs.
         """
-        L = [[0] * (m + 1) for i in range(n + 1)]
-        for i in range(n + 1):
-            for j in range(m + 1):
-                if i == 0 or j == 0:
-                    L[i][j] = 0
-                elif p1[i - 1] == p2[j - 1]:
-                    L[i][j] = L[i - 1][j - 1] + 1
-                else:
-                    L[i][j] = max(L[i - 1][j], L[i][j - 1])
-        return L[n][m]
+        return lcs(p1[:n], p2[:m])
@@ -3,11 +3,13 @@
 This module defines two time series preprocessing functions for standardisation and SAX representation.
 """
 
+from functools import lru_cache
+from statistics import NormalDist
+
 import numpy as np
-from scipy.stats import norm, zscore
 
 
-def sax(ts, seglen, alpha, diff=0):
+def sax(ts, seglen, alpha, diff=0, channels=1):
     """Symbolic Aggregate approXimation.
 
     Parameters
@@ -20,36 +22,91 @@ def sax(ts, seglen, alpha, diff=0):
         Alphabet size; number of discrete elements the time series are to be binned into.
     diff : int
         Degree of differencing applied before discretisation.
+    channels : int
+        Number of channels the time series are interleaved from. Channel c of every
+        time series is the series at index c modulo channels, and is discretised to
+        its own alphabet of symbols c * alpha to (c + 1) * alpha after "a".
 
     Returns
     -------
     List with a collection of discrete sequences from the time series.
     """
+    check_symbols(alpha, channels)
     breakpoints = get_breakpoints(alpha)
+    offsets = np.arange(len(ts)) % channels * alpha
 
     standardised = standardise(difference(ts, diff))
 
-    return [get_sax(series, seglen, breakpoints) for series in standardised]
+    # Discretise all time series at once if they have the same length
+    if isinstance(standardised, np.ndarray) and standardised.ndim == 2:
+        discretised = np.digitize(paa(standardised, seglen), breakpoints)
+        discretised += ord("a") + offsets[:, None]
+        return [row.tobytes().decode("latin-1") for row in discretised.astype(np.uint8)]
+
+    return [
+        get_sax(series, seglen, breakpoints, offset)
+        for series, offset in zip(standardised, offsets)
+    ]
+
 
+def check_symbols(alpha, channels=1):
+    """Check that all symbols fit in one byte, from "a" up to the end of latin-1."""
+    if ord("a") + channels * alpha > 256:
+        raise ValueError(
+            f"{channels} channels of {alpha} symbols exceed the "
+            f"{256 - ord('a')} available symbols"
+        )
 
-def get_sax(series, seglen, breakpoints):
+
+def get_sax(series, seglen, breakpoints, offset=0):
     """Get SAX representation of one time series."""
+    discretised = np.digitize(paa(series, seglen), breakpoints) + ord("a") + offset
+    return "".join(chr(x) for x in discretised)
+
+
+def reduce_runs(sequences):
+    """Collapse runs of the same symbol in sequences to one symbol (numerosity reduction).
+
+    Returns
+    -------
+    reduced : list
+        Sequences without consecutive repeated symbols.
+    positions : list
+        Arrays with the position in the original sequence where each symbol's run
+        starts, followed by the length of the original sequence.
+    """
+    reduced, positions = [], []
+    for sequence in sequences:
+        # Stored sequences give their bytes without being decoded to a string
+        if isinstance(sequence, str):
+            symbols = np.frombuffer(sequence.encode("latin-1"), dtype=np.uint8)
+        else:
+            symbols = np.asarray(sequence)
+        # Differences of bytes wrap around, but are only zero for repeated symbols
+        starts = np.flatnonzero(np.diff(symbols, prepend=~symbols[:1]))
+        reduced.append(symbols[starts].tobytes().decode("latin-1"))
+        positions.append(np.append(starts, len(symbols)))
+    return reduced, positions
+
+
+def paa(series, seglen):
+    """Piecewise Aggregate Approximation of time series along the last axis."""
     # No paa step necessary when seglen=1
     if seglen == 1:
-        paa = series
-    else:
-        if too_short := (len(series) % seglen):
-            append = [np.mean(series[-too_short:])] * (seglen - too_short)
-            series = np.append(series, append)
+        return series
 
-        segments = series.reshape((-1, seglen))
-        paa = np.mean(segments, axis=1)
+    # A last, too short segment is the mean of its values
+    series = np.asarray(series)
+    too_short = series.shape[-1] % seglen
+    full = series[..., : series.shape[-1] - too_short]
+    segments = full.reshape(full.shape[:-1] + (-1, seglen)).mean(axis=-1)
+    if not too_short:
+        return segments
+    rest = series[..., -too_short:].mean(axis=-1, keepdims=True)
+    return np.concatenate((segments, rest), axis=-1)
 
-    discretised = np.digitize(paa, breakpoints) + ord("a")
-    return "".join(chr(x) for x in discretised)
 
-
-def standardise(timeseries):
+def standardise(timeseries, dtype=None):
     """Standardise time series.
 
     Standardises data to have a mean of zero and a standard deviation of one.
@@ -58,6 +115,8 @@ def standardise(timeseries):
     ----------
     timeseries
         Database of time series to standardise.
+    dtype : dtype, optional
+        Floating point type of the standardised data. If None, it is inferred from the data.
 
     Returns
     -------
@@ -65,9 +124,9 @@ def standardise(timeseries):
         Database of standardised time series.
     """
     try:
-        return np.nan_to_num(zscore(timeseries, axis=1))
+        return np.nan_to_num(zscore(np.asarray(timeseries, dtype=dtype), axis=1))
     except ValueError:
-        return [np.nan_to_num(zscore(ts)) for ts in timeseries]
+        return [np.nan_to_num(zscore(np.asarray(ts, dtype=dtype))) for ts in timeseries]
 
 
 def difference(timeseries, diff):
@@ -94,5 +153,29 @@ def difference(timeseries, diff):
         return [np.diff(ts) for ts in timeseries]
 
 
+@lru_cache
 def get_breakpoints(a):
-    return norm.ppf(np.arange(1, a) / a, loc=0)
+    """Get breakpoints that divide the standard normal distribution into a equiprobable bins."""
+    breakpoints = np.array([NormalDist().inv_cdf(i / a) for i in range(1, a)])
+    breakpoints.setflags(write=False)
+    return breakpoints
+
+
+def zscore(a, axis=0, nan_policy="propagate"):
+    """Standardise values along an axis, like scipy.stats.zscore.
+
+    If nan_policy is "omit", NaNs are ignored when computing mean and standard deviation.
+    Constant values, and empty or all-NaN slices, are standardised to NaN. Mean and
+    standard deviation are computed from sums and counts, so such slices do not warn.
+    """
+    a = np.asarray(a)
+    if nan_policy == "omit":
+        total, count = np.nansum, np.sum(
+            ~np.isnan(a), axis=axis, keepdims=True, dtype=a.dtype
+        )
+    else:
+        total, count = np.sum, a.shape[axis]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = total(a, axis=axis, keepdims=True) / count
+        std = np.sqrt(total(np.square(a - mean), axis=axis, keepdims=True) / count)
+        return (a - mean) / std
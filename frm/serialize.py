@@ -0,0 +1,262 @@
+"""Serialisation module.
+
+This module defines functions that convert a tree of frequent patterns and
+mapped motifs to a handful of flat NumPy arrays and back. Variable-length
+fields are stored in compressed sparse row form: for example, the
+occurrences of the i-th pattern are seqs[occ_ptr[i]:occ_ptr[i + 1]] and
+starts[occ_ptr[i]:occ_ptr[i + 1]], and its children are the patterns at
+children[child_ptr[i]:child_ptr[i + 1]]. Patterns are stored as one byte
+per symbol.
+
+Checkpoints of the pattern miner are saved to a single .npz file with
+save_tree. Results are saved with save to a directory of .npy files, which
+load memory-maps, so representatives are only read when they are used.
+"""
+
+import json
+from os import getpid, makedirs, replace
+from os.path import join
+from threading import get_ident
+
+import numpy as np
+
+from .motif import Motif, set_supports
+from .storage import decode, encode
+
+VERSION = 5
+META = "meta.json"
+TREE_ARRAYS = (
+    "symbols",
+    "pattern_ptr",
+    "n_frequent",
+    "occ_ptr",
+    "seqs",
+    "starts",
+    "child_ptr",
+    "children",
+    "spans",
+)
+MOTIF_ARRAYS = (
+    "motif_symbols",
+    "motif_ptr",
+    "rep_ptr",
+    "representatives",
+    "match_ptr",
+    "match_series",
+    "match_starts",
+    "distances",
+    "lengths",
+    "seglens",
+    "channels",
+    "sampled",
+    "sampling_errors",
+)
+
+
+def tree_to_arrays(frequent):
+    """Convert a dictionary of frequent patterns to arrays.
+
+    Children that were removed from the dictionary as redundant are kept
+    after the frequent patterns, so the tree stays complete.
+    """
+    motifs = list(frequent.values())
+    position = {motif.pattern: i for i, motif in enumerate(motifs)}
+    occ_ptr, seqs, starts = [0], [], []
+    child_ptr, children = [0], []
+    for motif in motifs:
+        for seq, indexes in motif.indexes.items():
+            seqs += [seq] * len(indexes)
+            starts += indexes
+        occ_ptr.append(len(seqs))
+        for child in motif.children:
+            if child.pattern not in position:
+                position[child.pattern] = len(motifs)
+                motifs.append(child)
+            children.append(position[child.pattern])
+        child_ptr.append(len(children))
+
+    symbols, pattern_ptr = pack([motif.pattern for motif in motifs])
+    return {
+        "symbols": symbols,
+        "pattern_ptr": pattern_ptr,
+        "n_frequent": np.int64(len(frequent)),
+        "occ_ptr": np.array(occ_ptr, dtype=np.int64),
+        "seqs": np.array(seqs, dtype=np.int64),
+        "starts": np.array(starts, dtype=np.int64),
+        "child_ptr": np.array(child_ptr, dtype=np.int64),
+        "children": np.array(children, dtype=np.int64),
+        "spans": np.array([motif.span for motif in motifs], dtype=np.int64),
+    }
+
+
+def arrays_to_tree(arrays):
+    """Convert arrays back to a dictionary of frequent patterns."""
+    patterns = unpack(arrays["symbols"], arrays["pattern_ptr"])
+    motifs = [Motif(pattern) for pattern in patterns]
+    occ_ptr, child_ptr = arrays["occ_ptr"].tolist(), arrays["child_ptr"].tolist()
+    seqs, starts = arrays["seqs"].tolist(), arrays["starts"].tolist()
+    children, spans = arrays["children"].tolist(), arrays["spans"].tolist()
+    for i, motif in enumerate(motifs):
+        motif.span = spans[i]
+        for j in range(occ_ptr[i], occ_ptr[i + 1]):
+            motif.indexes[seqs[j]].append(starts[j])
+        motif.children = [motifs[c] for c in children[child_ptr[i] : child_ptr[i + 1]]]
+    set_supports(motifs)
+    return {motif.pattern: motif for motif in motifs[: int(arrays["n_frequent"])]}
+
+
+def motifs_to_arrays(motifs):
+    """Convert mapped motifs to arrays."""
+    symbols, motif_ptr = pack([motif.pattern for motif in motifs])
+    representatives = [motif.representative for motif in motifs]
+    rep_ptr = np.cumsum([0] + [len(rep) for rep in representatives])
+    match_ptr = np.cumsum([0] + [len(motif.best_matches) for motif in motifs])
+    return {
+        "motif_symbols": symbols,
+        "motif_ptr": motif_ptr,
+        "rep_ptr": rep_ptr.astype(np.int64),
+        "representatives": (
+            np.concatenate(representatives) if representatives else np.zeros(0)
+        ),
+        "match_ptr": match_ptr.astype(np.int64),
+        "match_series": np.array(
+            [i for motif in motifs for i in motif.best_matches], dtype=np.int64
+        ),
+        "match_starts": np.array(
+            [j for motif in motifs for j in motif.best_matches.values()], dtype=np.int64
+        ),
+        "distances": np.array([motif.distance for motif in motifs], dtype=np.float64),
+        "lengths": np.array([motif.length for motif in motifs], dtype=np.int64),
+        "seglens": np.array([motif._seglen for motif in motifs], dtype=np.int64),
+        "channels": np.array([motif.channel for motif in motifs], dtype=np.int64),
+        "sampled": np.array([motif.sampled for motif in motifs], dtype=np.int64),
+        "sampling_errors": np.array(
+            [motif.sampling_error for motif in motifs], dtype=np.float64
+        ),
+    }
+
+
+def arrays_to_motifs(arrays, frequent=None):
+    """Convert arrays back to mapped motifs.
+
+    Motifs whose pattern is in frequent are the Motif objects of the tree,
+    so they keep their occurrences and children.
+    """
+    frequent = frequent or {}
+    rep_ptr, match_ptr = arrays["rep_ptr"].tolist(), arrays["match_ptr"].tolist()
+    series, starts = arrays["match_series"].tolist(), arrays["match_starts"].tolist()
+    motifs = []
+    patterns = unpack(arrays["motif_symbols"], arrays["motif_ptr"])
+    for i, pattern in enumerate(patterns):
+        motif = frequent.get(pattern) or Motif(pattern)
+        motif.representative = arrays["representatives"][rep_ptr[i] : rep_ptr[i + 1]]
+        matches = range(match_ptr[i], match_ptr[i + 1])
+        motif.best_matches = {series[j]: starts[j] for j in matches}
+        motif.distance = float(arrays["distances"][i])
+        motif.length = int(arrays["lengths"][i])
+        motif._seglen = int(arrays["seglens"][i])
+        motif.channel = int(arrays["channels"][i])
+        motif.sampled = int(arrays["sampled"][i])
+        motif.sampling_error = float(arrays["sampling_errors"][i])
+        motifs.append(motif)
+    return motifs
+
+
+def pack(patterns):
+    """Concatenate patterns to one byte per symbol with pointers to their starts."""
+    ptr = np.cumsum([0] + [len(pattern) for pattern in patterns]).astype(np.int64)
+    return encode("".join(patterns)), ptr
+
+
+def unpack(symbols, ptr):
+    """Split concatenated symbols into patterns."""
+    symbols = decode(symbols)
+    ptr = ptr.tolist()
+    return [symbols[ptr[i] : ptr[i + 1]] for i in range(len(ptr) - 1)]
+
+
+def save_tree(filename, frequent, **state):
+    """Save frequent patterns and extra state arrays to an .npz file.
+
+    The file is written to a temporary file first, so a crash while saving
+    leaves a previously saved file intact.
+    """
+    tmp = f"{filename}.{getpid()}.{get_ident()}"
+    with open(tmp, "wb") as fp:
+        np.savez(fp, version=VERSION, **tree_to_arrays(frequent), **state)
+    replace(tmp, filename)
+
+
+def load_tree(filename):
+    """Load frequent patterns and extra state arrays from an .npz file."""
+    with np.load(filename) as npz:
+        arrays = dict(npz)
+    if arrays.pop("version") != VERSION:
+        raise ValueError(f"{filename} was saved with an unsupported version")
+    frequent = arrays_to_tree(arrays)
+    state = {key: arrays[key] for key in arrays if key not in TREE_ARRAYS}
+    return frequent, state
+
+
+def save(path, frequent=None, motifs=None):
+    """Save a tree of frequent patterns and/or mapped motifs to a directory.
+
+    Parameters
+    ----------
+    path : str
+        Directory to save to, created if it does not exist.
+    frequent : dict, optional
+        Dictionary of frequent motifs with string patterns as keys and Motif objects as values.
+    motifs : list, optional
+        Mapped motifs.
+    """
+    makedirs(path, exist_ok=True)
+    arrays = {}
+    if frequent is not None:
+        arrays.update(tree_to_arrays(frequent))
+    if motifs is not None:
+        arrays.update(motifs_to_arrays(motifs))
+    for name, array in arrays.items():
+        np.save(join(path, f"{name}.npy"), array)
+
+    # Write metadata last, it marks the directory as complete
+    with open(join(path, META), "w") as fp:
+        json.dump(
+            {
+                "version": VERSION,
+                "frequent": frequent is not None,
+                "motifs": motifs is not None,
+            },
+            fp,
+        )
+
+
+def load(path, mmap=True):
+    """Load a tree of frequent patterns and mapped motifs from a directory.
+
+    Parameters
+    ----------
+    path : str
+        Directory saved to with save.
+    mmap : bool, optional
+        Whether to memory-map arrays instead of reading them into memory.
+
+    Returns
+    -------
+    frequent : dict
+        Dictionary of frequent motifs, or None if no tree was saved.
+    motifs : list
+        Mapped motifs, or None if no motifs were saved.
+    """
+    with open(join(path, META)) as fp:
+        meta = json.load(fp)
+    if meta["version"] != VERSION:
+        raise ValueError(f"{path} was saved with an unsupported version")
+
+    def read(names):
+        mode = "r" if mmap else None
+        return {n: np.load(join(path, f"{n}.npy"), mmap_mode=mode) for n in names}
+
+    frequent = arrays_to_tree(read(TREE_ARRAYS)) if meta["frequent"] else None
+    motifs = arrays_to_motifs(read(MOTIF_ARRAYS), frequent) if meta["motifs"] else None
+    return frequent, motifs
@@ -0,0 +1,324 @@
+"""Service module.
+
+This module defines the Service class, an asyncio server that mines jobs
+posted to it over HTTP, on a Unix socket or a localhost TCP port. A client
+posts one job as JSON to /jobs, e.g.
+
+    {"data": [[1, 2, 3, ...], ...], "params": {"minsup": 0.3, "seglen": 5, "alpha": 4}}
+
+or {"path": ...} with a dataset path as accepted by frm-miner instead of
+"data", and optionally the "field" to load from .csv and .json files. The
+parameters are those of frm-miner: minsup, seglen, alpha, omax, diff and k.
+The service answers with a stream of events, as JSON lines
+(application/x-ndjson) until it closes the connection:
+
+- {"event": "accepted", "job": ..., "shared": ...}
+- {"event": "stage", "stage": ...} whenever a stage of the pipeline finishes;
+- {"event": "motifs", "motifs": [[pattern, distance], ...]} with the top k
+  after each batch of mapped patterns;
+- {"event": "done", "motifs": ..., "seconds": ...} or {"event": "error", "message": ...}.
+
+Invalid jobs are answered with status 400 and a single error event.
+
+Jobs run on a bounded pool of worker processes. Identical jobs, with the
+same data and parameters, that are submitted while one is running share
+its events instead of being mined again. Jobs on a path are identified by
+the size and modification time of the files of the dataset.
+
+Run as python -m frm.service --help.
+"""
+
+import argparse
+import asyncio
+import json
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import Pipe, get_context
+from os import listdir, stat
+from os.path import isdir, join
+from time import perf_counter
+
+from .cache import fingerprint, make_key
+from .cli import PARAMETERS, get_files, load_dataset
+from .miner import Miner
+from .storage import META, OFFSETS, VALUES
+
+# Maximum length in bytes of a line, jobs with inline data can be large
+LIMIT = 2**30
+
+
+class Service:
+    """Asyncio mining service.
+
+    Parameters
+    ----------
+    max_workers : int, optional
+        Number of worker processes. If None, the number of CPUs is used.
+    batch : int, optional
+        Number of patterns to map between streamed results.
+
+    Attributes
+    ----------
+    jobs : dict
+        Running jobs, keyed by the fingerprint of their data and parameters.
+    """
+
+    def __init__(self, max_workers=None, batch=100):
+        self.max_workers = max_workers
+        self.batch = batch
+        self.jobs = {}
+        self._pool = None
+
+    async def start(self, path=None, host="127.0.0.1", port=0):
+        """Start serving on a Unix socket if path is given, otherwise on a TCP port.
+
+        Returns
+        -------
+        server : asyncio.Server
+            The server, whose sockets give the address it is listening on.
+        """
+        # Forked workers would inherit the sockets of open connections
+        context = get_context("spawn")
+        self._pool = ProcessPoolExecutor(self.max_workers, mp_context=context)
+        if path is not None:
+            return await asyncio.start_unix_server(self.handle, path, limit=LIMIT)
+        return await asyncio.start_server(self.handle, host, port, limit=LIMIT)
+
+    def close(self):
+        """Shut down the worker processes."""
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+
+    async def handle(self, reader, writer):
+        """Handle a connection: read a posted job and stream its events."""
+        try:
+            key, args = self.parse(await read_request(reader))
+        except (ValueError, KeyError, TypeError, OSError, EOFError) as e:
+            await respond(writer, "400 Bad Request")
+            await send(writer, {"event": "error", "message": f"Invalid job: {e}"})
+            writer.close()
+            return
+
+        shared = key in self.jobs
+        if not shared:
+            self.jobs[key] = Job()
+            asyncio.create_task(self.run(key, *args))
+        job = self.jobs[key]
+        await respond(writer, "200 OK")
+        await send(writer, {"event": "accepted", "job": key, "shared": shared})
+
+        try:
+            async for event in job.subscribe():
+                await send(writer, event)
+        except ConnectionError:
+            pass
+        writer.close()
+
+    def parse(self, request):
+        """Get the fingerprint of a job and the arguments to mine it.
+
+        Only the parameters of frm-miner are accepted, so clients cannot make
+        the workers write checkpoints or caches or spawn processes.
+        """
+        params = dict(request["params"])
+        unknown = set(params) - set(PARAMETERS)
+        if unknown:
+            raise ValueError(f"unknown parameters {sorted(unknown)}")
+        Miner(**params)
+        field = request.get("field")
+        if "path" in request:
+            data, path = None, request["path"]
+            content = stat_dataset(path)
+        else:
+            data, path = request["data"], None
+            content = fingerprint(data)
+        key = make_key("job", content, field, sorted(params.items()))
+        return key, (data, path, field, params)
+
+    async def run(self, key, data, path, field, params):
+        """Mine a job on the pool, publishing its events to its subscribers."""
+        job = self.jobs[key]
+        loop = asyncio.get_running_loop()
+        events = asyncio.Queue()
+        receiver, sender = Pipe(duplex=False)
+
+        def receive():
+            while receiver.poll():
+                events.put_nowait(receiver.recv())
+
+        def finish(future):
+            # The worker sent all its events before returning, or it died
+            receive()
+            events.put_nowait(None)
+
+        start = perf_counter()
+        loop.add_reader(receiver.fileno(), receive)
+        future = loop.run_in_executor(
+            self._pool, mine_job, data, path, field, params, self.batch, sender
+        )
+        future.add_done_callback(finish)
+        try:
+            while (event := await events.get()) is not None:
+                job.publish(event)
+            motifs = await future
+            job.publish(
+                {"event": "done", "motifs": motifs, "seconds": perf_counter() - start}
+            )
+        except Exception as e:
+            job.publish({"event": "error", "message": f"{type(e).__name__}: {e}"})
+        finally:
+            loop.remove_reader(receiver.fileno())
+            receiver.close()
+            sender.close()
+            del self.jobs[key]
+            job.finish()
+
+
+class Job:
+    """Events of a running job, replayed to subscribers that join late."""
+
+    def __init__(self):
+        self.history = []
+        self.listeners = set()
+        self.finished = False
+
+    def publish(self, event):
+        """Send an event to all subscribers."""
+        # Only the latest top k is of interest to subscribers that join later
+        if event["event"] == "motifs" and self.history:
+            if self.history[-1]["event"] == "motifs":
+                self.history.pop()
+        self.history.append(event)
+        for queue in self.listeners:
+            queue.put_nowait(event)
+
+    def finish(self):
+        """Mark the job as finished, ending all subscriptions."""
+        self.finished = True
+        for queue in self.listeners:
+            queue.put_nowait(None)
+
+    async def subscribe(self):
+        """Yield all events of the job so far and then new ones as they are published."""
+        queue = asyncio.Queue()
+        for event in self.history:
+            queue.put_nowait(event)
+        if self.finished:
+            queue.put_nowait(None)
+        self.listeners.add(queue)
+        try:
+            while (event := await queue.get()) is not None:
+                yield event
+        finally:
+            self.listeners.discard(queue)
+
+
+def mine_job(data, path, field, params, batch, events):
+    """Mine a job in a worker process, sending its events through a pipe.
+
+    Returns
+    -------
+    motifs : list
+        Pattern and distance of each motif.
+    """
+    if data is None:
+        data = load_dataset(path, field)
+
+    def callback(name, stats):
+        events.send({"event": "stage", "stage": name})
+
+    miner = Miner(**params, callback=callback)
+    for motifs in miner.iter_mine(data, batch):
+        motifs = [[m.pattern, float(m.distance)] for m in motifs]
+        events.send({"event": "motifs", "motifs": motifs})
+    return motifs
+
+
+def stat_dataset(path):
+    """Get name, size and modification time of the data files of a dataset."""
+    if isdir(path) and META in listdir(path):
+        files = [join(path, VALUES), join(path, OFFSETS)]
+    else:
+        files = get_files(path)
+    return [(file, stat(file).st_size, stat(file).st_mtime_ns) for file in files]
+
+
+async def read_request(reader):
+    """Read the JSON body of an HTTP request posting a job to /jobs."""
+    method, target, _ = (await reader.readline()).decode("latin-1").split(" ", 2)
+    headers = {}
+    while (line := await reader.readline()).strip():
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    if (method, target) != ("POST", "/jobs"):
+        raise ValueError(f"expected POST /jobs, not {method} {target}")
+    return json.loads(await reader.readexactly(int(headers["content-length"])))
+
+
+async def respond(writer, status):
+    """Write the status line and headers of a streamed HTTP response."""
+    writer.write(
+        f"HTTP/1.1 {status}\r\nContent-Type: application/x-ndjson\r\n"
+        "Connection: close\r\n\r\n".encode()
+    )
+    await writer.drain()
+
+
+async def send(writer, event):
+    """Write an event as a JSON line."""
+    writer.write(json.dumps(event).encode() + b"\n")
+    await writer.drain()
+
+
+async def submit(job, path=None, host="127.0.0.1", port=None):
+    """Submit a job to a service, yielding its events.
+
+    Parameters
+    ----------
+    job : dict
+        Job with "params" and either "data" or "path".
+    path : str, optional
+        Unix socket of the service. If None, host and port are used.
+    """
+    if path is not None:
+        reader, writer = await asyncio.open_unix_connection(path, limit=LIMIT)
+    else:
+        reader, writer = await asyncio.open_connection(host, port, limit=LIMIT)
+    body = json.dumps(job).encode()
+    writer.write(
+        f"POST /jobs HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body
+    )
+    try:
+        # Both successful and invalid jobs stream events after the headers
+        while (await reader.readline()).strip():
+            pass
+        while line := await reader.readline():
+            yield json.loads(line)
+    finally:
+        writer.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m frm.service", description="Serve mining jobs."
+    )
+    parser.add_argument("--socket", help="Unix socket to listen on")
+    parser.add_argument("--port", type=int, default=8765, help="localhost TCP port")
+    parser.add_argument("--workers", type=int, help="number of worker processes")
+    parser.add_argument("--batch", type=int, default=100)
+    args = parser.parse_args(argv)
+
+    async def serve():
+        service = Service(args.workers, args.batch)
+        server = await service.start(args.socket, port=args.port)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            service.close()
+
+    asyncio.run(serve())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Statistics module.
+
+This module defines the Stats class, which records where a run of the
+mining pipeline spends its time: wall and CPU time per stage, candidate
+counts per level of the pattern miner, and how many patterns were mapped
+to motifs. Recording is skipped entirely if no Stats object is passed.
+"""
+
+from contextlib import contextmanager, nullcontext
+from time import perf_counter, process_time
+
+
+class Stats:
+    """Statistics of one run of the mining pipeline.
+
+    Parameters
+    ----------
+    callback : callable, optional
+        Called with the name of a stage and this object whenever a stage finishes.
+
+    Attributes
+    ----------
+    stages : dict
+        Wall and CPU time in seconds per stage, in order of completion.
+    levels : list
+        Number of candidates, pruned and kept patterns, occurrences, and approximate
+        bytes held before pruning per pattern length.
+    peak_nbytes : int
+        Approximate peak bytes held by patterns and their occurrences.
+    mapped : int
+        Number of patterns mapped to motifs.
+    abandoned : int
+        Number of patterns whose mapping was abandoned because they could not reach the top k.
+    sampled : int
+        Number of patterns mapped using a sample of their occurrences.
+    """
+
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.stages = {}
+        self.levels = []
+        self.peak_nbytes = 0
+        self.mapped = 0
+        self.abandoned = 0
+        self.sampled = 0
+
+    def __repr__(self):
+        stages = ", ".join(f"{s}={t['wall']:.3f}s" for s, t in self.stages.items())
+        return f"Stats({stages})"
+
+    @contextmanager
+    def stage(self, name):
+        """Time the stage executed in the with-block."""
+        wall, cpu = perf_counter(), process_time()
+        yield
+        self.stages[name] = {
+            "wall": perf_counter() - wall,
+            "cpu": process_time() - cpu,
+        }
+        if self.callback:
+            self.callback(name, self)
+
+    def level(self, k, candidates, kept, occurrences, nbytes=0):
+        """Record pruning of candidates of length k."""
+        self.peak_nbytes = max(self.peak_nbytes, nbytes)
+        self.levels.append(
+            {
+                "k": k,
+                "candidates": candidates,
+                "pruned": candidates - kept,
+                "kept": kept,
+                "occurrences": occurrences,
+                "nbytes": nbytes,
+            }
+        )
+
+    def as_dict(self):
+        """Get statistics as a dictionary of builtins."""
+        return {
+            "stages": self.stages,
+            "levels": self.levels,
+            "peak_nbytes": self.peak_nbytes,
+            "mapped": self.mapped,
+            "abandoned": self.abandoned,
+            "sampled": self.sampled,
+        }
+
+
+def stage(stats, name):
+    """Time stage if stats are recorded."""
+    return nullcontext() if stats is None else stats.stage(name)
@@ -0,0 +1,267 @@
+"""Storage module.
+
+This module defines the FlatDataset class, a database of time series that
+lives in flat files on disk instead of in memory. All values are stored
+back to back in one values file, with an offsets file marking where each
+time series starts, and the SAX representation is stored as one byte per
+symbol. The files are opened with np.memmap, so only the windows that are
+actually accessed are paged in.
+"""
+
+import json
+from glob import glob
+from os import getpid, makedirs, remove, replace
+from os.path import exists, join
+from threading import Lock, get_ident
+
+import numpy as np
+
+from .preprocessing import check_symbols, get_breakpoints, get_sax
+
+VALUES = "values.bin"
+OFFSETS = "offsets.bin"
+MOMENTS = "moments.bin"
+SYMBOLS = "symbols-{seglen}-{alpha}-{diff}.bin"
+META = "meta.json"
+
+# Serialises discretisation of the same dataset by several threads
+lock = Lock()
+
+
+class FlatDataset:
+    """Database of time series stored in memory-mapped flat files.
+
+    Parameters
+    ----------
+    path : str
+        Directory containing the dataset files, as written by FlatDataset.create.
+
+    Attributes
+    ----------
+    values : np.memmap
+        All time series concatenated.
+    offsets : np.memmap
+        Start of each time series in values, followed by the total length.
+    moments : np.memmap
+        Mean and standard deviation of each time series.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(join(path, META)) as fp:
+            self.meta = json.load(fp)
+
+        self.values = memmap(join(path, VALUES), self.meta["dtype"])
+        self.offsets = memmap(join(path, OFFSETS), np.int64)
+        self.moments = memmap(join(path, MOMENTS), np.float64).reshape((-1, 2))
+
+    @classmethod
+    def create(cls, path, timeseries, dtype=np.float64):
+        """Write time series to flat files and open them.
+
+        Parameters
+        ----------
+        path : str
+            Directory to write the dataset files to.
+        timeseries : iterable
+            Time series to store. Each time series is written as soon as it
+            is produced, so this may be a generator.
+        dtype : dtype, optional
+            Data type of the stored values.
+        """
+        makedirs(path, exist_ok=True)
+        # Symbols of previously stored time series are stale
+        for filename in glob(
+            join(path, SYMBOLS.format(seglen="*", alpha="*", diff="*"))
+        ):
+            remove(filename)
+        offsets = [0]
+        moments = []
+        with open(join(path, VALUES), "wb") as fp:
+            for ts in timeseries:
+                ts = np.asarray(ts, dtype=dtype)
+                ts.tofile(fp)
+                offsets.append(offsets[-1] + len(ts))
+                moments.append((np.mean(ts), np.std(ts)) if len(ts) else (0, 0))
+        np.array(offsets, dtype=np.int64).tofile(join(path, OFFSETS))
+        np.array(moments, dtype=np.float64).tofile(join(path, MOMENTS))
+
+        with open(join(path, META), "w") as fp:
+            json.dump({"dtype": np.dtype(dtype).name}, fp)
+
+        return cls(path)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return self.values[self.offsets[i] : self.offsets[i + 1]]
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def lengths(self):
+        """Get lengths of all time series."""
+        return np.diff(self.offsets)
+
+    def sax(self, seglen, alpha, diff=0):
+        """Get SAX representation, discretising only if not stored yet.
+
+        Each combination of parameters is stored in its own symbols file, so
+        differently parametrised runs on the same dataset never overwrite a
+        file that is mapped by another. Time series are discretised one at a
+        time to a temporary file, which is moved into place when complete.
+        """
+        check_symbols(alpha)
+        lengths = np.maximum(self.lengths() - diff, 0)
+        offsets = np.concatenate(([0], np.cumsum(-(-lengths // seglen))))
+        filename = join(
+            self.path, SYMBOLS.format(seglen=seglen, alpha=alpha, diff=diff)
+        )
+
+        with lock:
+            if not exists(filename):
+                tmp = f"{filename}.{getpid()}.{get_ident()}"
+                breakpoints = get_breakpoints(alpha)
+                symbols = np.memmap(tmp, np.uint8, "w+", shape=(max(offsets[-1], 1),))
+                for i, ts in enumerate(self):
+                    ts = np.diff(ts, n=diff)
+                    if len(ts):
+                        with np.errstate(invalid="ignore", divide="ignore"):
+                            ts = np.nan_to_num((ts - np.mean(ts)) / np.std(ts))
+                    sequence = get_sax(ts, seglen, breakpoints)
+                    symbols[offsets[i] : offsets[i + 1]] = encode(sequence)
+                symbols.flush()
+                del symbols
+                replace(tmp, filename)
+
+        return SymbolSequences(memmap(filename, np.uint8), offsets)
+
+    def standardised(self, dtype=None):
+        """Get lazily standardised view of the time series."""
+        return StandardisedSeries(self, dtype)
+
+
+class SymbolSequences:
+    """Collection of discrete sequences stored in one flat byte buffer."""
+
+    def __init__(self, buffer, offsets):
+        self.buffer = buffer
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        return SymbolView(self.buffer, self.offsets[i], self.offsets[i + 1])
+
+
+class SymbolView:
+    """Read-only string-like view on a sequence in a byte buffer.
+
+    Slicing decodes only the requested symbols, so patterns can be looked
+    up without materialising the whole sequence.
+    """
+
+    chunk = 1 << 16
+
+    def __init__(self, buffer, start, stop):
+        self.buffer = buffer
+        self.start = int(start)
+        self.stop = int(stop)
+
+    def __len__(self):
+        return self.stop - self.start
+
+    def window(self, start, stop):
+        """Get a view on part of the sequence, like slicing but without decoding."""
+        start, stop, _ = slice(start, stop).indices(len(self))
+        return SymbolView(
+            self.buffer, self.start + start, self.start + max(start, stop)
+        )
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            window = decode(self.buffer[self.start + start : self.start + stop])
+            return window if step == 1 else window[::step]
+        return str(self)[key]
+
+    def __iter__(self):
+        for start in range(self.start, self.stop, self.chunk):
+            yield from decode(self.buffer[start : min(start + self.chunk, self.stop)])
+
+    def __str__(self):
+        return decode(self.buffer[self.start : self.stop])
+
+    def __eq__(self, other):
+        return str(self) == str(other)
+
+    def __array__(self, dtype=None, copy=None):
+        symbols = self.buffer[self.start : self.stop]
+        return symbols if dtype is None else symbols.astype(dtype)
+
+
+class StandardisedSeries:
+    """Collection of lazily standardised time series in a FlatDataset."""
+
+    def __init__(self, dataset, dtype=None):
+        self.dataset = dataset
+        self.dtype = dataset.values.dtype if dtype is None else np.dtype(dtype)
+
+    def __len__(self):
+        return len(self.dataset)
+
+    def __getitem__(self, i):
+        mean, std = self.dataset.moments[i]
+        return Series(self.dataset[i], mean, std, self.dtype)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+class Series:
+    """Lazily standardised view on one time series."""
+
+    def __init__(self, values, mean, std, dtype):
+        self.values = values
+        self.mean = mean
+        self.std = std
+        self.dtype = dtype
+
+    def __len__(self):
+        return len(self.values)
+
+    def window(self, start, stop):
+        """Get a lazily standardised view on part of the time series."""
+        return Series(self.values[start:stop], self.mean, self.std, self.dtype)
+
+    def __getitem__(self, key):
+        window = np.asarray(self.values[key])
+        if not self.std:
+            return np.zeros_like(window, dtype=self.dtype)
+        return ((window - self.mean) / self.std).astype(self.dtype, copy=False)
+
+    def __array__(self, dtype=None, copy=None):
+        return self[:] if dtype is None else self[:].astype(dtype)
+
+
+def memmap(filename, dtype):
+    """Open a possibly empty flat file read-only."""
+    if not np.fromfile(filename, dtype, count=1).size:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(filename, dtype, "r")
+
+
+def encode(sequence):
+    """Encode string sequence as one byte per symbol."""
+    return np.frombuffer(sequence.encode("latin-1"), dtype=np.uint8)
+
+
+def decode(buffer):
+    """Decode bytes to string sequence."""
+    return np.asarray(buffer).tobytes().decode("latin-1")
@@ -0,0 +1,118 @@
+"""Transform module.
+
+This module defines the transform function, which computes the minimum
+z-normalised Euclidean distance from each time series to each motif
+representative, e.g. to use motifs as features for a classifier.
+
+Distances to all windows of a series are computed at once from sliding dot
+products, as in MASS. The FFT of each series is computed once and reused
+for all motifs, and motifs of the same length are stacked, so their dot
+products are computed with one batched inverse FFT and share the rolling
+means and standard deviations of the windows.
+"""
+
+import os
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+
+def transform(ts, motifs, max_workers=None, max_bytes=2**28):
+    """Compute distances from time series to motif representatives.
+
+    Parameters
+    ----------
+    ts : list
+        Database of time series, of shape (channels, length) for multichannel motifs.
+    motifs : list
+        Mapped motifs.
+    max_workers : int, optional
+        Number of threads to compute distances of chunks of time series on. If None,
+        the number of CPUs is used.
+    max_bytes : int, optional
+        Approximate bytes of intermediate arrays held at once over all threads.
+
+    Returns
+    -------
+    distances : ndarray
+        Array of shape (n_series, n_motifs) with the minimum distance, divided by the
+        square root of the length of the motif, over all windows of each time series.
+        NaN if a time series is shorter than a motif.
+    """
+    # Stack representatives of motifs with the same channel and length
+    groups = defaultdict(list)
+    for i, motif in enumerate(motifs):
+        groups[motif.channel, motif.length].append(i)
+    groups = {
+        key: (
+            np.array(idx),
+            np.nan_to_num(
+                np.array([motifs[i].representative for i in idx], dtype=np.float64)
+            ),
+        )
+        for key, idx in groups.items()
+    }
+
+    workers = max_workers or os.cpu_count() or 1
+    distances = np.full((len(ts), len(motifs)), np.nan)
+    chunks = np.array_split(np.arange(len(ts)), min(len(ts), 4 * workers) or 1)
+
+    def transform_chunk(chunk):
+        for i in chunk:
+            distances[i] = series_distances(
+                ts[i], groups, len(motifs), max_bytes // workers
+            )
+
+    with ThreadPoolExecutor(workers) as executor:
+        # Consume results to raise exceptions of the threads
+        list(executor.map(transform_chunk, chunks))
+    return distances
+
+
+def series_distances(series, groups, n_motifs, max_bytes):
+    """Compute distances from one time series to stacked motif representatives."""
+    series = np.asarray(series, dtype=np.float64)
+    if series.ndim == 1:
+        series = series[None]
+    distances = np.full(n_motifs, np.nan)
+
+    # FFT and cumulative sums of each channel, shared by all motif lengths
+    cached = {}
+    for (channel, m), (idx, reps) in groups.items():
+        n = series.shape[1]
+        if not 0 < m <= n:
+            continue
+        if channel not in cached:
+            # Centred to limit rounding errors in the cumulative sums
+            values = series[channel] - series[channel].mean()
+            nfft = 1 << (n - 1).bit_length()
+            cached[channel] = (
+                nfft,
+                np.fft.rfft(values, nfft),
+                np.concatenate(([0], np.cumsum(values))),
+                np.concatenate(([0], np.cumsum(values**2))),
+                values.std(),
+            )
+        nfft, spectrum, sums, sq_sums, scale = cached[channel]
+
+        # Rolling mean and standard deviation of windows
+        mean = (sums[m:] - sums[:-m]) / m
+        std = np.sqrt(np.maximum((sq_sums[m:] - sq_sums[:-m]) / m - mean**2, 0))
+        # Constant windows cannot be z-normalised
+        std[std <= 1e-8 * scale] = np.inf
+
+        # Compute dot products of batches of representatives within the memory cap
+        batch = max(1, max_bytes // (nfft * 32))
+        for start in range(0, len(idx), batch):
+            q = reps[start : start + batch]
+            dots = np.fft.irfft(
+                np.fft.rfft(q[:, ::-1], nfft, axis=1) * spectrum, nfft, axis=1
+            )[:, m - 1 : n]
+            # Squared distances to the z-normalised windows follow from the dot products
+            sq = (q**2).sum(axis=1)[:, None] + m
+            sq = sq - 2 * (dots - mean * q.sum(axis=1)[:, None]) / std
+            distances[idx[start : start + batch]] = np.sqrt(
+                np.maximum(sq.min(axis=1), 0) / m
+            )
+    return distances
@@ -0,0 +1,86 @@
+"""Windows module.
+
+This module defines functions to virtually split long time series into
+fixed-size, overlapping windows, so a few long recordings can be mined as
+a database of many windows. The support of a pattern is then the fraction
+of windows it occurs in. Windows are slices of the discretised and
+standardised series, which are views for arrays and lazy views for the
+series and sequences of a FlatDataset, and are identified by the series
+and offset they start at, so motifs can be located in the original series.
+"""
+
+from .storage import Series, SymbolView
+
+
+def window_origins(lengths, window, step, seglen=1):
+    """Get series and start of the windows of time series.
+
+    Parameters
+    ----------
+    lengths : list
+        Lengths of the time series.
+    window : int
+        Length of a window.
+    step : int
+        Distance between the starts of consecutive windows.
+    seglen : int, optional
+        Segment length, window and step must be multiples of it so that windows
+        of discretised sequences line up with those of the time series.
+
+    Returns
+    -------
+    origins : list
+        Tuples of the index of the time series and the start of the window in it.
+        A series shorter than a window is one window. The last window of a series
+        ends at most a segment before its end.
+    """
+    if window % seglen or step % seglen or step <= 0:
+        raise ValueError("window and step must be positive multiples of seglen")
+    origins = []
+    for i, length in enumerate(lengths):
+        last = max(length - window, 0) // seglen * seglen
+        starts = list(range(0, last + 1, step))
+        if starts[-1] != last:
+            starts.append(last)
+        origins += [(i, start) for start in starts]
+    return origins
+
+
+def split(data, origins, window, seglen=1):
+    """Split time series or sequences into windows.
+
+    Parameters
+    ----------
+    data : list
+        Time series, or sequences discretised with a segment length of seglen.
+    origins : list
+        Series and start of each window, see window_origins.
+    window : int
+        Length of a window in the time series.
+    seglen : int, optional
+        Number of values of the time series per element of data.
+    """
+    windows = []
+    for i, start in origins:
+        begin, end = start // seglen, (start + window) // seglen
+        series = data[i]
+        if isinstance(series, (Series, SymbolView)):
+            # Slicing would read the whole window now, instead of what is used
+            windows.append(series.window(begin, end))
+        else:
+            windows.append(series[begin:end])
+    return windows
+
+
+def locate(motifs, origins):
+    """Set the locations of the best matches of motifs in the original time series.
+
+    Best matches in overlapping windows can be the same location, which is kept once.
+    """
+    for motif in motifs:
+        motif.locations = sorted(
+            {
+                (origins[w][0], origins[w][1] + int(start))
+                for w, start in motif.best_matches.items()
+            }
+        )
@@ -0,0 +1,82 @@
+import json
+import subprocess
+import sys
+import unittest
+from importlib.util import find_spec
+from itertools import product
+from os.path import dirname, join
+
+import numpy as np
+
+from frm.bench import (
+    BASELINE,
+    GENERATORS,
+    GRID,
+    bike,
+    compare,
+    compare_backends,
+    import_time,
+    ragged,
+    run,
+)
+
+
+class TestBench(unittest.TestCase):
+    def test_generators(self):
+        for name, generator in GENERATORS.items():
+            a, b = generator(5, 100), generator(5, 100)
+            self.assertEqual(5, len(a))
+            for x, y in zip(a, b):
+                np.testing.assert_array_equal(x, y)
+
+    def test_ragged(self):
+        lengths = {len(ts) for ts in ragged(20, 100)}
+        self.assertGreater(len(lengths), 1)
+        self.assertTrue(all(50 <= m <= 150 for m in lengths))
+
+    def test_run(self):
+        results = run(['random_walks'], {'n': [10], 'length': [100]}, repeat=1)
+        result = results['random_walks 10 100']
+        self.assertListEqual(
+            ['sax', 'patterns', 'remove_redundant', 'map'], list(result['stages'])
+        )
+        self.assertGreater(result['tree_nbytes'], 0)
+        # Allocations include the data and the tree
+        self.assertGreater(result['peak_memory'], 10 * 100 * 8)
+
+    def test_compare_backends(self):
+        data = bike(join(dirname(__file__), '..', 'experiments', 'bike'))
+        self.assertGreater(len(data), 10)
+        results = compare_backends([x[:1500] for x in data[:10]], repeat=1)
+        self.assertIn('bike python', results)
+        if find_spec('numba') is not None:
+            self.assertEqual(
+                results['bike python']['motifs'], results['bike numba']['motifs']
+            )
+
+    def test_compare(self):
+        baseline = {'a': {'stages': {'map': 1.0, 'sax': 1.0}, 'peak_memory': 100}}
+        results = {'a': {'stages': {'map': 2.0, 'sax': 1.1}, 'peak_memory': 200}}
+        self.assertListEqual(
+            [('a', 'map', 1.0, 2.0), ('a', 'peak_memory', 100, 200)],
+            compare(results, baseline),
+        )
+
+    def test_baseline(self):
+        # The stored baseline covers the default grid
+        with open(join(dirname(__file__), '..', BASELINE)) as fp:
+            baseline = json.load(fp)
+        for name, n, length in product(GENERATORS, GRID['n'], GRID['length']):
+            self.assertIn('peak_memory', baseline[f'{name} {n} {length}'])
+
+    def test_import_time(self):
+        self.assertGreater(import_time('frm', 1), 0)
+
+        # Slow dependencies are only imported when they are used
+        code = 'import sys, frm; print(*sorted(sys.modules))'
+        res = subprocess.run([sys.executable, '-c', code], capture_output=True)
+        modules = res.stdout.decode().split()
+        self.assertIn('frm', modules)
+        self.assertNotIn('scipy', modules)
+        self.assertNotIn('mass_ts', modules)
+        self.assertNotIn('numba', modules)
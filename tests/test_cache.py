@@ -0,0 +1,80 @@
+import unittest
+from importlib.util import find_spec
+from os import listdir, utime
+from os.path import join
+from tempfile import TemporaryDirectory
+
+import numpy as np
+from test_data import data, rag, ts
+
+from frm import Miner
+from frm.cache import Cache, fingerprint
+from frm.serialize import load
+
+
+class TestCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_fingerprint(self):
+        self.assertEqual(fingerprint(ts), fingerprint(np.array(ts)))
+        self.assertNotEqual(fingerprint(ts), fingerprint(ts[:-1]))
+        self.assertNotEqual(fingerprint(rag), fingerprint(rag[::-1]))
+
+    def test_stages(self):
+        miner = Miner(0.3, 5, 4, k=5, cache=self.tmp.name, stats=True)
+        expected = miner.mine(data)
+        stages = sorted(name.split('-')[0] for name in listdir(self.tmp.name))
+        self.assertListEqual(['motifs', 'sax', 'tree'], stages)
+
+        # Same parameters reuse the motifs
+        frequent = miner.frequent
+        motifs = miner.mine(data)
+        self.assertListEqual(expected, motifs)
+        self.assertDictEqual({}, miner.stats.stages)
+        self.assertListEqual(list(frequent), list(miner.frequent))
+
+        # Cached motifs keep their tree and time series
+        with TemporaryDirectory() as path:
+            miner.save(path)
+            self.assertListEqual(list(frequent), list(load(path)[0]))
+        self.assertTrue(motifs[0].get_all_indexes())
+        self.assertEqual(len(data), len(motifs[0]._ts))
+        if find_spec('mass_ts') is not None:
+            motifs[0].get_more_matches(1.0)
+
+        # Another k reuses the tree
+        miner = Miner(0.3, 5, 4, k=3, cache=self.tmp.name, stats=True)
+        self.assertListEqual(expected[:3], miner.mine(data))
+        self.assertNotIn('patterns', miner.stats.stages)
+
+        # Another minsup reuses the sequences
+        miner = Miner(0.4, 5, 4, k=3, cache=Cache(self.tmp.name))
+        self.assertListEqual(Miner(0.4, 5, 4, k=3).mine(data), miner.mine(data))
+        self.assertEqual(6, len(listdir(self.tmp.name)))
+
+    def test_evict(self):
+        cache = Cache(self.tmp.name, max_bytes=3000)
+        for i, key in enumerate('abc'):
+            with cache.put(key) as path:
+                np.save(join(path, 'x.npy'), np.zeros(100))
+            utime(join(self.tmp.name, key), (i, i))
+
+        # Using a makes b the least recently used entry
+        self.assertIsNotNone(cache.get('a'))
+        with cache.put('d') as path:
+            np.save(join(path, 'x.npy'), np.zeros(100))
+        self.assertListEqual(['a', 'c', 'd'], sorted(listdir(self.tmp.name)))
+        self.assertIsNone(cache.get('b'))
+
+    def test_channels(self):
+        x = np.cumsum(np.random.default_rng(0).standard_normal((20, 2, 60)), axis=2)
+        miner = Miner(0.3, 3, 4, cache=self.tmp.name)
+        expected = miner.mine(x), miner.cooccurring
+        self.assertListEqual(expected[0], miner.mine(x))
+        self.assertEqual(len(expected[1]), len(miner.cooccurring))
+        for motif in miner.motifs:
+            self.assertEqual(20, len(motif._ts))
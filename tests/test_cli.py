@@ -0,0 +1,96 @@
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from os import mkdir
+from os.path import join
+from tempfile import TemporaryDirectory
+
+from test_data import rag, ts
+
+from frm.cli import ResultStore, find_datasets, load_dataset, main
+
+
+class TestCLI(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        self.datasets = join(self.tmp.name, 'datasets')
+        self.results = join(self.tmp.name, 'results.sqlite')
+        mkdir(self.datasets)
+        for name, series in [('rag', rag), ('ts', ts)]:
+            mkdir(join(self.datasets, name))
+            with open(join(self.datasets, name, f'{name}_TRAIN.tsv'), 'w') as fp:
+                for row in series:
+                    fp.write('\t'.join(map(str, [0, *row])) + '\n')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def mine(self):
+        argv = [self.datasets, '--minsup', '0.5', '--seglen', '1', '2']
+        main(argv + ['--alpha', '3', '--results', self.results, '--processes', '2'])
+        store = ResultStore(self.results)
+        results = store.results()
+        store.close()
+        return results
+
+    def test_find_datasets(self):
+        manifest = join(self.tmp.name, 'manifest.txt')
+        with open(manifest, 'w') as fp:
+            fp.write(join(self.datasets, 'rag') + '\n')
+        self.assertEqual(2, len(find_datasets([self.datasets])))
+        self.assertEqual(1, len(find_datasets([manifest])))
+
+    def test_main(self):
+        results = self.mine()
+        self.assertEqual(4, len(results))
+        for result in results:
+            if result['dataset'].endswith('rag') and result['params']['seglen'] == 1:
+                self.assertListEqual(['abc'], [p for p, _ in result['motifs']])
+
+    def test_skip_seen(self):
+        seconds = sorted(r['seconds'] for r in self.mine())
+        self.assertListEqual(seconds, sorted(r['seconds'] for r in self.mine()))
+
+    def test_failed_job(self):
+        # .json files need a field, the job fails but the others are mined
+        mkdir(join(self.datasets, 'json'))
+        with open(join(self.datasets, 'json', 'a.json'), 'w') as fp:
+            fp.write('[{"speed": 1}]')
+        out = StringIO()
+        with redirect_stdout(out):
+            results = self.mine()
+        self.assertEqual(4, len(results))
+        self.assertIn('--field is required', out.getvalue())
+        self.assertIn('2 jobs failed', out.getvalue())
+
+    def test_fields(self):
+        datasets = join(self.tmp.name, 'csv')
+        mkdir(datasets)
+        mkdir(join(datasets, 'a'))
+        with open(join(datasets, 'a', 'a.csv'), 'w') as fp:
+            fp.write('speed,hr\n' + '\n'.join(f'{i % 5},{i % 3}' for i in range(30)))
+
+        argv = [datasets, '--minsup', '0.5', '--seglen', '1', '2', '--alpha', '3']
+        argv += ['--results', self.results, '--processes', '1']
+        for field in ('speed', 'hr'):
+            out = StringIO()
+            with redirect_stdout(out):
+                main(argv + ['--field', field])
+            # Other fields of the same datasets are other jobs
+            self.assertIn('2 jobs to go', out.getvalue())
+
+        store = ResultStore(self.results)
+        results = store.results()
+        self.assertTrue(store.seen(join(datasets, 'a'), results[0]['params'], 'hr'))
+        store.close()
+        self.assertEqual(4, len(results))
+        fields = sorted(r['field'] for r in results)
+        self.assertListEqual(['hr', 'hr', 'speed', 'speed'], fields)
+        self.assertTrue(all('field' not in r['params'] for r in results))
+
+    def test_csv_first_column(self):
+        mkdir(join(self.datasets, 'csv'))
+        with open(join(self.datasets, 'csv', 'a.csv'), 'w') as fp:
+            fp.write('1,5\n2,6\n')
+        data = load_dataset(join(self.datasets, 'csv'))
+        self.assertListEqual([[1.0, 2.0]], [ts.tolist() for ts in data])
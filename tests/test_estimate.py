@@ -0,0 +1,54 @@
+import unittest
+
+from test_data import data
+
+from frm import Miner
+from frm.bench import random_walks
+from frm.estimate import estimate
+from frm.patterns import PatternMiner
+from frm.preprocessing import sax
+from frm.stats import Stats
+
+
+class TestEstimate(unittest.TestCase):
+    def test_exact(self):
+        sequences = sax(data, 5, 4)
+        stats = Stats()
+        PatternMiner(0.3, 1, stats).mine(sequences)
+        res = estimate(sequences, 0.3)
+
+        for expected, got in zip(stats.levels[:2], res['levels']):
+            self.assertTrue(got['exact'])
+            self.assertEqual(expected['candidates'], got['candidates'])
+            self.assertEqual(expected['kept'], got['kept'])
+
+    def test_mapping(self):
+        sequences = sax(data, 5, 4)
+        res = estimate(sequences, 0.3, seglen=5)
+
+        # Each symbol occurs as a frequent 1-pattern and is read twice to map it
+        symbols = sum(len(s) for s in sequences)
+        self.assertEqual(2 * symbols * 5, res['levels'][0]['mapping_values'])
+        self.assertAlmostEqual(
+            res['mapping_values'], sum(lvl['mapping_values'] for lvl in res['levels'])
+        )
+
+    def test_extrapolate(self):
+        sequences = sax(random_walks(100, 1000), 5, 4)
+        stats = Stats()
+        pm = PatternMiner(0.3, 1, stats)
+        pm.mine(sequences)
+        res = estimate(sequences, 0.3)
+
+        self.assertFalse(res['levels'][-1]['exact'])
+        self.assertLess(res['patterns'], 2 * len(pm.frequent))
+        self.assertGreater(res['patterns'], len(pm.frequent) / 2)
+        self.assertLess(res['peak_nbytes'], 2 * stats.peak_nbytes)
+        self.assertGreater(res['peak_nbytes'], stats.peak_nbytes / 2)
+
+    def test_budget(self):
+        miner = Miner(0.3, 5, 4)
+        with self.assertWarns(ResourceWarning):
+            miner.estimate(data, budget=1000)
+        with self.assertRaises(MemoryError):
+            miner.estimate(data, budget=1000, strict=True)
@@ -0,0 +1,95 @@
+import json
+import unittest
+from os import listdir, mkdir, utime
+from os.path import dirname, join
+from tempfile import TemporaryDirectory
+
+from test_data import rag
+
+from frm.io import load_csv, load_json, load_ucr, read_json
+
+BIKE = join(dirname(__file__), '..', 'experiments', 'bike')
+
+
+class TestIO(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        self.out = join(self.tmp.name, 'out')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_json(self):
+        paths = []
+        for i, ts in enumerate(rag):
+            paths.append(join(self.tmp.name, f'{i}.json'))
+            with open(paths[-1], 'w') as fp:
+                records = [{'speed': x, 'heart_rate': None} for x in ts]
+                json.dump(records, fp, indent=4)
+        return paths
+
+    def test_load_json(self):
+        ds = load_json(self.write_json(), 'speed', self.out)
+        self.assertListEqual(rag, [ts.tolist() for ts in ds])
+
+    def test_load_json_missing(self):
+        ds = load_json(self.write_json(), 'heart_rate', self.out)
+        self.assertEqual(len(ds), 0)
+
+    def test_sidecar(self):
+        paths = self.write_json()
+        load_json(paths, 'speed', self.out)
+        self.assertIn('0.json.speed.read_json.npz', listdir(self.tmp.name))
+
+        # Sidecar is used instead of the file itself
+        with open(paths[0], 'w') as fp:
+            fp.write('[]')
+        utime(paths[0], (0, 0))
+        ds = load_json(paths, 'speed', self.out)
+        self.assertListEqual(rag, [ts.tolist() for ts in ds])
+
+    def test_sidecar_failure(self):
+        paths = self.write_json()
+        # Sidecar cannot replace a directory, the temporary file is removed
+        mkdir(paths[0] + '.speed.read_json.npz')
+        ds = load_json(paths, 'speed', self.out)
+        self.assertListEqual(rag, [ts.tolist() for ts in ds])
+        self.assertFalse([f for f in listdir(self.tmp.name) if f[-1].isdigit()])
+
+    def test_json_strings(self):
+        path = join(self.tmp.name, 'strings.json')
+        with open(path, 'w') as fp:
+            fp.write('[{"speed": "1.5", "name": "a, b"}, {"speed": ""}, {"speed": 2}]')
+        values, lengths = read_json(path, 'speed')
+        self.assertListEqual([1.5, 2.0], values.tolist())
+
+    def test_processes(self):
+        ds = load_json(self.write_json(), 'speed', self.out, processes=2, cache=False)
+        self.assertListEqual(rag, [ts.tolist() for ts in ds])
+
+    def test_load_csv(self):
+        path = join(self.tmp.name, 'data.csv')
+        with open(path, 'w') as fp:
+            fp.write('a,b\n1,2\n3,\n5,6\n')
+        self.assertListEqual([2.0, 6.0], load_csv([path], 'b', self.out)[0].tolist())
+
+        with open(path, 'w') as fp:
+            fp.write('1;2\n3;\n5;6\n')
+        ds = load_csv([path], 0, self.out, delimiter=';')
+        self.assertListEqual([1.0, 3.0, 5.0], ds[0].tolist())
+
+    def test_load_ucr(self):
+        path = join(self.tmp.name, 'data.tsv')
+        with open(path, 'w') as fp:
+            for i, ts in enumerate(rag):
+                fp.write('\t'.join(map(str, [i, *ts, 'NaN'])) + '\n')
+        ds = load_ucr([path], self.out)
+        self.assertListEqual(rag, [ts.tolist() for ts in ds])
+
+    def test_bike(self):
+        path = join(BIKE, sorted(listdir(BIKE))[0])
+        with open(path) as fp:
+            expected = [r['speed'] for r in json.load(fp) if r['speed'] is not None]
+        values, lengths = read_json(path, 'speed')
+        self.assertListEqual(expected, values.tolist())
+        self.assertListEqual([len(expected)], lengths.tolist())
@@ -0,0 +1,99 @@
+import os
+import subprocess
+import sys
+import unittest
+from importlib.util import find_spec
+from os.path import dirname
+
+import numpy as np
+from test_data import data
+
+from frm import kernels
+from frm.patterns import PatternMiner
+from frm.preprocessing import sax, standardise
+
+ROOT = dirname(dirname(os.path.abspath(__file__)))
+
+
+@unittest.skipIf(find_spec('numba') is None, 'Numba is not installed')
+class TestKernels(unittest.TestCase):
+    def setUp(self):
+        self.backend = kernels.get_backend()
+
+    def tearDown(self):
+        kernels.set_backend(self.backend)
+
+    def both(self, kernel, *args):
+        results = []
+        for backend in kernels.BACKENDS:
+            kernels.set_backend(backend)
+            results.append(kernel(*args))
+        return results
+
+    def test_lcs(self):
+        for p1, p2 in [
+            ('bbbbbbbbbb', 'bbbcbbb'),
+            ('abcab', 'cab'),
+            ('a', 'b'),
+            ('', 'a'),
+        ]:
+            python, numba = self.both(kernels.lcs, p1, p2)
+            self.assertEqual(python, numba)
+
+    def test_redundant(self):
+        pm = PatternMiner(0.3, 1)
+        pm.mine(sax(data, 5, 4))
+        patterns = sorted(pm.frequent, key=len, reverse=True)
+        for omax in (0.5, 0.8):
+            python, numba = self.both(kernels.redundant, patterns, omax)
+            self.assertGreater(len(python), 0)
+            self.assertSetEqual(python, numba)
+
+    def test_best_match(self):
+        rng = np.random.default_rng(0)
+        ts = standardise(data)
+        for series in ts[:10]:
+            starts = rng.choice(len(series) - 25, 5)
+            occurrences = np.array([series[s : s + 25] for s in starts])
+            rep = rng.standard_normal(25)
+            for dtype in (np.float32, np.float64):
+                python, numba = self.both(
+                    kernels.best_match, occurrences.astype(dtype), rep
+                )
+                self.assertEqual(python[0], numba[0])
+                self.assertAlmostEqual(python[1], numba[1], places=4)
+
+        # Constant and partly missing occurrences
+        occurrences = np.array(
+            [
+                np.ones(10),
+                np.r_[np.ones(5), np.arange(5.0)],
+                np.r_[np.arange(7.0), [np.nan] * 3],
+            ]
+        )
+        python, numba = self.both(kernels.best_match, occurrences, rep[:10])
+        self.assertEqual(python[0], numba[0])
+        self.assertAlmostEqual(python[1], numba[1])
+
+    def test_concurrent_compile(self):
+        # Threads of mine_many compile the kernels at once in a fresh interpreter
+        code = (
+            'from test_data import data\n'
+            'from frm import Miner, kernels\n'
+            'assert not kernels._compiled\n'
+            'Miner(0.3, 5, 4, k=5).mine_many([data] * 8, 8)\n'
+        )
+        env = {**os.environ, 'FRM_BACKEND': 'numba'}
+        env['PYTHONPATH'] = os.pathsep.join([ROOT, env.get('PYTHONPATH', '')])
+        result = subprocess.run(
+            [sys.executable, '-c', code],
+            cwd=dirname(__file__),
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        self.assertEqual(0, result.returncode, result.stderr)
+
+    def test_set_backend(self):
+        with self.assertRaises(ValueError):
+            kernels.set_backend('fortran')
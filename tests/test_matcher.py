@@ -0,0 +1,63 @@
+import unittest
+
+import numpy as np
+from test_data import data, seq_1
+
+from frm import Miner
+from frm.matcher import PatternMatcher
+from frm.preprocessing import sax
+
+
+class TestMatcher(unittest.TestCase):
+    def test_find(self):
+        patterns = ['a', 'ac', 'cac', 'ba', 'abc', 'ccc', 'd']
+        pm = PatternMatcher(patterns)
+        for sequence in seq_1:
+            expected = sorted(
+                (i, p)
+                for p in patterns
+                for i in range(len(sequence))
+                if sequence.startswith(p, i)
+            )
+            self.assertListEqual(expected, sorted(pm.find(sequence)))
+
+    def test_iter_find(self):
+        pm = PatternMatcher(['ac', 'cac', 'acac'])
+        sequence = 'acacacbac'
+        chunks = [sequence[:3], sequence[3:4], '', sequence[4:]]
+        self.assertListEqual(pm.find(sequence), list(pm.iter_find(chunks)))
+        self.assertListEqual(
+            [(s + 10, p) for s, p in pm.find(sequence)], pm.find(sequence, offset=10)
+        )
+
+    def test_confirm(self):
+        miner = Miner(0.3, 5, 4, k=5)
+        motifs = miner.mine(data)
+        pm = PatternMatcher(miner.frequent.values())
+        self.assertEqual(len(miner.frequent), len(pm))
+
+        for i, series in enumerate(data):
+            matches = pm.find(sax([series], 5, 4)[0])
+            confirmed = pm.confirm(series, matches, 5)
+            for start, motif, dist in confirmed:
+                self.assertIs(motif, miner.frequent[motif.pattern])
+                self.assertLessEqual(dist, motif.distance)
+
+            # Motifs whose mapping was abandoned confirm nothing
+            self.assertTrue(all(np.isfinite(m.distance) for _, m, _ in confirmed))
+            self.assertTrue(
+                all(
+                    np.isfinite(m.distance)
+                    for _, m, _ in pm.confirm(series, matches, 5, eta=np.inf)
+                )
+            )
+
+            # Occurrences of mapped motifs are all confirmed without a radius
+            found = {
+                (start // 5, motif.pattern)
+                for start, motif, _ in pm.confirm(series, matches, 5, eta=np.inf)
+            }
+            for motif in motifs:
+                if i in motif.best_matches:
+                    start = motif.best_matches[i] // 5
+                    self.assertIn((start, motif.pattern), found)
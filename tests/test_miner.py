@@ -1,8 +1,10 @@
 import unittest
 
-from test_data import rag, ts
+import numpy as np
+from test_data import data, rag, ts
 
 from frm import Miner
+from frm.preprocessing import reduce_runs, sax
 
 
 class TestMiner(unittest.TestCase):
@@ -17,3 +19,101 @@ class TestMiner(unittest.TestCase):
         motifs = miner.mine(rag)
         patterns = [m.pattern for m in motifs]
         self.assertListEqual(patterns, ['abc'])
+
+    def test_partitions(self):
+        miner = Miner(0.5, 1, 3, partitions=2)
+        motifs = miner.mine(ts)
+        patterns = sorted([m.pattern for m in motifs])
+        self.assertListEqual(patterns, ['aa', 'ca', 'cc'])
+
+    def test_dtype(self):
+        expected = Miner(0.3, 5, 4, k=5).mine(data)
+        got = Miner(0.3, 5, 4, k=5, dtype=np.float32).mine(data)
+        self.assertListEqual([m.pattern for m in expected], [m.pattern for m in got])
+        for a, b in zip(expected, got):
+            self.assertEqual(b.representative.dtype, np.float32)
+            self.assertAlmostEqual(a.distance, b.distance, delta=1e-5 * a.distance)
+
+    def test_time_budget(self):
+        miner = Miner(0.3, 5, 4, k=5, time_budget=0)
+        motifs = miner.mine(data)
+        self.assertTrue(miner.partial)
+        self.assertListEqual(motifs, [])
+
+        miner = Miner(0.3, 5, 4, k=5, time_budget=60)
+        self.assertEqual(len(miner.mine(data)), 5)
+        self.assertFalse(miner.partial)
+
+    def test_iter_mine(self):
+        expected = Miner(0.3, 5, 4, k=5).mine(data)
+        results = list(Miner(0.3, 5, 4, k=5).iter_mine(data, batch=2))
+        self.assertGreater(len(results), 1)
+        self.assertListEqual(results[-1], expected)
+        for motifs in results:
+            self.assertLessEqual(len(motifs), 5)
+
+    def test_mine_many(self):
+        miner = Miner(0.3, 5, 4, k=5, stats=True)
+        expected = [miner.mine(data), miner.mine(data[:50])]
+        self.assertListEqual(expected, miner.mine_many([data, data[:50]], 2))
+        self.assertListEqual(expected[1], miner.mine(data[:50]))
+
+    def test_max_occurrences(self):
+        expected = Miner(0.3, 5, 4, k=5).mine(data)
+        self.assertTrue(all(m.sampling_error == 0 for m in expected))
+
+        miner = Miner(0.3, 5, 4, k=5, max_occurrences=50, stats=True)
+        motifs = miner.mine(data)
+        self.assertGreater(miner.stats.sampled, 0)
+        self.assertListEqual(
+            motifs, Miner(0.3, 5, 4, k=5, max_occurrences=50).mine(data)
+        )
+        for m in motifs:
+            # Every time series with an occurrence keeps a best match
+            self.assertEqual(len(m.get_all_indexes()), len(m.best_matches))
+            if m.sampled < m.occurrences:
+                self.assertGreater(m.sampling_error, 0)
+
+    def test_runs(self):
+        rng = np.random.default_rng(0)
+        x = np.sin(np.arange(600) / 30 + rng.uniform(0, 6, (30, 1)))
+        miner = Miner(0.5, 2, 4, k=5, runs=True)
+        motifs = miner.mine(x)
+        self.assertGreater(len(motifs), 0)
+        sequences = sax(x, 2, 4)
+        for m in motifs:
+            self.assertNotRegex(m.pattern, r'(.)\1')
+            self.assertGreater(m.span, len(m.pattern))
+            self.assertLessEqual(m.length, m.span * 2)
+            for i, start in m.best_matches.items():
+                self.assertLess(start, 600)
+
+            # Occurrences are mapped back to the start of a run of their first symbol
+            for i, starts in m.get_all_indexes().items():
+                for start in starts:
+                    sequence = sequences[i]
+                    self.assertTrue(start == 0 or sequence[start - 1] != m.pattern[0])
+                    reduced = reduce_runs([sequence[start:]])[0][0]
+                    self.assertTrue(reduced.startswith(m.pattern))
+
+        with self.assertRaises(ValueError):
+            Miner(0.5, 2, 4, runs=True, window=100).mine(x)
+
+    def test_channels(self):
+        x = np.cumsum(np.random.default_rng(0).standard_normal((20, 60)), axis=1)
+        expected = Miner(0.3, 3, 4).mine(x)
+        miner = Miner(0.3, 3, 4)
+        motifs = miner.mine(np.stack([x, x], axis=1))
+
+        # Second channel has its own alphabet, shifted by alpha
+        shift = str.maketrans('abcd', 'efgh')
+        channels = [[m.pattern for m in motifs if m.channel == c] for c in (0, 1)]
+        self.assertCountEqual([m.pattern for m in expected], channels[0])
+        self.assertCountEqual([p.translate(shift) for p in channels[0]], channels[1])
+        for m in motifs:
+            self.assertLess(max(m.best_matches), len(x))
+
+        # Identical channels co-occur wherever both have a best match
+        pairs = {frozenset((a.pattern, b.pattern)) for a, b, _ in miner.cooccurring}
+        for p in channels[0]:
+            self.assertIn(frozenset((p, p.translate(shift))), pairs)
@@ -1,6 +1,10 @@
+import tracemalloc
 import unittest
 
-from frm.motif import Motif
+import numpy as np
+
+from frm.kernels import best_match
+from frm.motif import Motif, accumulate, closest, set_supports
 
 
 class TestMotif(unittest.TestCase):
@@ -13,3 +17,65 @@ class TestMotif(unittest.TestCase):
         a.record_index(0, 1)
         self.assertEqual(list(a.indexes.keys()), [0])
         self.assertEqual(a.indexes[0], [1])
+
+    def test_sample_indexes(self):
+        a = Motif(pattern='ab')
+        for j in range(100):
+            a.record_index(0, j)
+        a.record_index(1, 0)
+        a.record_index(2, 5)
+        a.record_index(2, 7)
+
+        self.assertDictEqual(dict(a.get_all_indexes()), a.sample_indexes())
+        sample = a.sample_indexes(10, seed=1)
+        self.assertEqual(11, a.sampled)
+        self.assertEqual(103, a.occurrences)
+        self.assertListEqual([0, 1, 2], sorted(sample))
+        self.assertEqual(9, len(sample[0]))
+        self.assertTrue(set(sample[0]) <= set(range(100)))
+        self.assertDictEqual(sample, a.sample_indexes(10, seed=1))
+        self.assertNotEqual(sample, a.sample_indexes(10, seed=2))
+
+    def test_set_supports(self):
+        a, ab, abc = Motif('a'), Motif('ab'), Motif('abc')
+        a.children, ab.children = [ab], [abc]
+        a.record_index(0, 0)
+        ab.record_index(1, 0)
+        abc.record_index(0, 2)
+        abc.record_index(2, 0)
+        set_supports([a, ab, abc])
+        self.assertListEqual([3, 3, 2], [a.support, ab.support, abc.support])
+
+    def test_accumulate(self):
+        occurrences = np.random.default_rng(0).standard_normal((7, 5))
+        occurrences[3:, 4] = np.nan
+        occurrences[:, 3] = np.nan
+        mean, count, sq_sum = accumulate(occurrences, chunk=2)
+        np.testing.assert_allclose(np.nanmean(occurrences[:, :3], axis=0), mean[:3])
+        self.assertTrue(np.isnan(mean[3]))
+        self.assertListEqual([7, 7, 7, 0, 3], count.tolist())
+        np.testing.assert_allclose(np.nansum(occurrences**2, axis=0), sq_sum)
+        self.assertEqual(0, len(accumulate([])[0]))
+
+    def test_closest(self):
+        rng = np.random.default_rng(0)
+        occurrences = rng.standard_normal((7, 5))
+        occurrences[3:, 4] = np.nan
+        rep = rng.standard_normal(5)
+        for chunk in (2, 7):
+            self.assertEqual(
+                best_match(occurrences, rep), closest(occurrences, rep, chunk)
+            )
+
+        # Only a chunk of occurrences is held at once
+        def occurrences():
+            for i in range(20000):
+                yield np.sin(np.arange(1000) / 50 + i % 97)
+
+        tracemalloc.start()
+        try:
+            closest(occurrences(), np.sin(np.arange(1000) / 50 + 3), chunk=100)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        self.assertLess(peak, 10 * 100 * 1000 * 8)
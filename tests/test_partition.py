@@ -0,0 +1,48 @@
+import unittest
+
+from test_data import data, rseq_1, seq_1
+
+from frm.partition import PartitionMiner, split
+from frm.patterns import PatternMiner
+from frm.preprocessing import sax
+
+
+class TestPartitionMiner(unittest.TestCase):
+    def assertSameTree(self, sequences, minsup, omax, partitions):
+        pm = PatternMiner(minsup, omax)
+        pm.mine(sequences)
+        part = PartitionMiner(minsup, omax, partitions)
+        part.mine(sequences)
+
+        self.assertListEqual(sorted(pm.frequent), sorted(part.frequent))
+        for pattern, motif in pm.frequent.items():
+            expected = {s: sorted(i) for s, i in motif.get_all_indexes().items()}
+            got = {
+                s: sorted(i)
+                for s, i in part.frequent[pattern].get_all_indexes().items()
+            }
+            self.assertDictEqual(expected, got)
+
+    def test_split(self):
+        shards = list(split(seq_1, 2))
+        self.assertListEqual([0, 3], [offset for offset, _ in shards])
+        self.assertListEqual(seq_1, [s for _, shard in shards for s in shard])
+
+    def test_mine(self):
+        self.assertSameTree(seq_1, 0.5, 1, 2)
+
+    def test_rag_mine(self):
+        self.assertSameTree(rseq_1, 0.5, 1, 3)
+
+    def test_omax(self):
+        self.assertSameTree(rseq_1, 0.5, 0.8, 2)
+
+    def test_data(self):
+        self.assertSameTree(sax(data, 5, 4), 0.3, 1, 4)
+
+    def test_processes(self):
+        pm = PatternMiner(0.3, 1)
+        pm.mine(sax(data, 5, 4))
+        part = PartitionMiner(0.3, 1, 4, 2)
+        part.mine(sax(data, 5, 4))
+        self.assertListEqual(sorted(pm.frequent), sorted(part.frequent))
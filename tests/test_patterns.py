@@ -1,8 +1,14 @@
 import unittest
+from importlib.util import module_from_spec, spec_from_file_location
+from os.path import dirname, join
 
-from test_data import rseq_1, seq_1
+from test_data import data, rseq_1, seq_1
 
 from frm.patterns import PatternMiner
+from frm.preprocessing import sax
+from frm.stats import Stats
+
+EXPERIMENT = join(dirname(__file__), '..', 'experiments', 'patterns.py')
 
 
 class TestPatternMiner(unittest.TestCase):
@@ -18,6 +24,8 @@ class TestPatternMiner(unittest.TestCase):
         expected = ['a', 'aa', 'c', 'ca', 'cc']
 
         self.assertListEqual(expected, sorted(pm.frequent))
+        for motif in pm.frequent.values():
+            self.assertEqual(len(motif.get_all_indexes()), motif.support)
 
     def test_rag_mine(self):
         pm = PatternMiner(0.5, 1)
@@ -42,3 +50,41 @@ class TestPatternMiner(unittest.TestCase):
         expected = ['abc']
 
         self.assertListEqual(expected, sorted(pm.frequent))
+
+    def test_nbytes(self):
+        for omax in (1, 0.8):
+            pm = PatternMiner(0.5, omax, Stats())
+            pm.mine(seq_1)
+
+            expected = sum(m.nbytes() for m in pm.frequent.values())
+            self.assertEqual(expected, pm.nbytes)
+            self.assertGreater(pm.peak_nbytes, pm.nbytes)
+
+        # Memory is only accounted for when it is used
+        pm = PatternMiner(0.5, 1)
+        pm.mine(seq_1)
+        self.assertEqual(0, pm.peak_nbytes)
+
+    def test_profile_memory_peak(self):
+        # Experiments e7 and e9 compare the peak memory of FRM-Miner 1.0 and 2.0
+        spec = spec_from_file_location('experiment_patterns', EXPERIMENT)
+        experiment = module_from_spec(spec)
+        spec.loader.exec_module(experiment)
+        for frm in (1, 2):
+            self.assertGreater(experiment.profile_memory_peak(data[:50], frm), 0)
+
+    def test_memory_budget(self):
+        sequences = sax(data, 5, 4)
+        stats = Stats()
+        full = PatternMiner(0.3, 1, stats)
+        full.mine(sequences)
+
+        # 1-patterns are always mined, the budget bounds longer patterns
+        budget = (stats.levels[0]['nbytes'] + full.peak_nbytes) // 2
+        pm = PatternMiner(0.3, 1, memory_budget=budget)
+        pm.mine(sequences)
+
+        self.assertGreater(pm.effective_minsup, 0.3)
+        self.assertLessEqual(pm.peak_nbytes, budget)
+        self.assertGreater(max(map(len, pm.frequent)), 1)
+        self.assertLess(set(pm.frequent), set(full.frequent))
@@ -1,8 +1,10 @@
 import unittest
+import warnings
 
+import numpy as np
 from test_data import data, norm, rag, rseq_1, rseq_2, seq_1, seq_2, ts
 
-from frm.preprocessing import sax, standardise
+from frm.preprocessing import get_breakpoints, reduce_runs, sax, standardise, zscore
 
 
 class TestPreprocessing(unittest.TestCase):
@@ -26,3 +28,55 @@ class TestPreprocessing(unittest.TestCase):
     def test_rag_sax_seglen_2(self):
         got = sax(standardise(rag), 2, 3)
         self.assertEqual(rseq_2, got)
+
+    def test_standardise_dtype(self):
+        self.assertEqual(standardise(ts, np.float32).dtype, np.float32)
+        for series in standardise(rag, np.float32):
+            self.assertEqual(series.dtype, np.float32)
+
+    def test_breakpoints(self):
+        expected = [-0.6744897501960817, 0, 0.6744897501960817]
+        np.testing.assert_allclose(expected, get_breakpoints(4), atol=1e-12)
+        self.assertEqual(1, len(get_breakpoints(2)))
+
+    def test_zscore(self):
+        x = np.array([1.0, 2.0, np.nan, 3.0])
+        expected = [-(1.5**0.5), 0, np.nan, 1.5**0.5]
+        np.testing.assert_allclose(expected, zscore(x, nan_policy='omit'))
+        self.assertTrue(np.isnan(zscore(x)).all())
+        self.assertTrue(np.isnan(zscore(np.ones(3))).all())
+
+        # Empty and all-NaN input gives NaN without warnings
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            self.assertEqual(0, zscore(np.zeros(0), nan_policy='omit').size)
+            self.assertEqual(0, zscore(np.zeros(0)).size)
+            self.assertTrue(np.isnan(zscore([np.nan, np.nan], nan_policy='omit')).all())
+            self.assertEqual((2, 0), zscore(np.zeros((2, 0)), axis=1).shape)
+
+    def test_sax_channels(self):
+        sequences = sax(ts[:4], 1, 3, channels=2)
+        self.assertListEqual(seq_1[:4:2], sequences[::2])
+        shift = str.maketrans('abc', 'def')
+        self.assertListEqual(
+            [s.translate(shift) for s in seq_1[1:4:2]], sequences[1::2]
+        )
+
+        # Symbols of all channels must fit in one byte
+        self.assertEqual(4, len(sax(ts[:4], 1, 53, channels=3)))
+        for data in [ts[:4], rag]:
+            with self.assertRaises(ValueError):
+                sax(data, 1, 80, channels=2)
+
+    def test_reduce_runs(self):
+        reduced, positions = reduce_runs(seq_1)
+        self.assertListEqual(['abcba', 'aca', 'ca', 'cbabc', 'acacac'], reduced)
+        self.assertListEqual([0, 1, 2, 4, 5, 6], positions[0].tolist())
+        for sequence, r, p in zip(seq_1, reduced, positions):
+            runs = [r[i] * (p[i + 1] - p[i]) for i in range(len(r))]
+            self.assertEqual(sequence, ''.join(runs))
+
+        reduced, positions = reduce_runs(['', 'a', 'aaab', 'abbba'])
+        self.assertListEqual(['', 'a', 'ab', 'aba'], reduced)
+        run_lengths = [np.diff(p).tolist() for p in positions]
+        self.assertListEqual([[], [1], [3, 1], [1, 3, 1]], run_lengths)
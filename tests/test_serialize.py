@@ -0,0 +1,79 @@
+import unittest
+from os.path import join
+from tempfile import TemporaryDirectory
+
+import numpy as np
+from test_data import data, rseq_1, seq_2
+
+from frm import Miner
+from frm.patterns import PatternMiner
+from frm.serialize import arrays_to_tree, load, load_tree, save_tree, tree_to_arrays
+from frm.stats import Stats
+
+
+class TestSerialize(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def assertTreeEqual(self, expected, got):
+        self.assertListEqual(list(expected), list(got))
+        for pattern, motif in expected.items():
+            self.assertDictEqual(dict(motif.indexes), dict(got[pattern].indexes))
+            self.assertEqual(motif.support, got[pattern].support)
+            self.assertListEqual(motif.children, got[pattern].children)
+
+    def test_arrays(self):
+        pm = PatternMiner(0.5, 1)
+        pm.mine(rseq_1)
+        self.assertTreeEqual(pm.frequent, arrays_to_tree(tree_to_arrays(pm.frequent)))
+
+    def test_save(self):
+        pm = PatternMiner(0.5, 1)
+        pm.mine(seq_2)
+        filename = join(self.tmp.name, 'tree.npz')
+        save_tree(filename, pm.frequent, k=3)
+        frequent, state = load_tree(filename)
+        self.assertTreeEqual(pm.frequent, frequent)
+        self.assertDictEqual({'k': 3}, state)
+
+    def test_resume(self):
+        expected = PatternMiner(0.5, 0.8, Stats())
+        expected.mine(seq_2)
+
+        # Stop after 1-patterns, as if mining was interrupted
+        filename = join(self.tmp.name, 'checkpoint.npz')
+        PatternMiner(0.5, 0.8, Stats(), max_len=1, checkpoint=filename).mine(seq_2)
+        pm = PatternMiner(0.5, 0.8, Stats())
+        pm.mine(seq_2, resume_from=filename)
+        self.assertListEqual(sorted(expected.frequent), sorted(pm.frequent))
+        self.assertEqual(expected.peak_nbytes, pm.peak_nbytes)
+
+        with self.assertRaises(ValueError):
+            PatternMiner(0.3).mine(seq_2, resume_from=filename)
+
+    def test_save_load(self):
+        miner = Miner(0.3, 5, 4, k=5)
+        expected = miner.mine(data)
+        miner.save(self.tmp.name)
+        frequent, motifs = load(self.tmp.name)
+        self.assertTreeEqual(miner.frequent, frequent)
+        self.assertListEqual(expected, motifs)
+        for a, b in zip(expected, motifs):
+            self.assertIsInstance(b.representative, np.memmap)
+            np.testing.assert_array_equal(a.representative, b.representative)
+            self.assertDictEqual(a.best_matches, b.best_matches)
+            self.assertEqual(a.distance, b.distance)
+            self.assertIs(frequent[b.pattern], b)
+
+    def test_remap(self):
+        miner = Miner(0.3, 5, 4, k=5)
+        expected = miner.mine(data)
+        miner.save(self.tmp.name)
+        frequent, _ = load(self.tmp.name)
+        motifs = Miner(0.3, 5, 4, k=5).remap(data, frequent)
+        self.assertListEqual(expected, motifs)
+        for a, b in zip(expected, motifs):
+            self.assertAlmostEqual(a.distance, b.distance)
@@ -0,0 +1,113 @@
+import asyncio
+import unittest
+from os.path import join
+from tempfile import TemporaryDirectory
+
+from test_data import data
+
+from frm import Miner
+from frm.service import Service, submit
+
+PARAMS = {'minsup': 0.3, 'seglen': 5, 'alpha': 4, 'k': 3}
+
+
+async def collect(events):
+    return [event async for event in events]
+
+
+class TestService(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_service(self):
+        asyncio.run(self.run_service())
+
+    async def run_service(self):
+        service = Service(1, batch=5)
+        path = join(self.tmp.name, 'frm.sock')
+        server = await service.start(path)
+        try:
+            job = {'data': data, 'params': PARAMS}
+            results = await asyncio.gather(
+                collect(submit(job, path)), collect(submit(job, path))
+            )
+            invalid = await collect(submit({'data': data, 'params': {}}, path))
+        finally:
+            server.close()
+            service.close()
+
+        # Identical concurrent jobs are mined once
+        shared = sorted(events[0]['shared'] for events in results)
+        self.assertListEqual([False, True], shared)
+        self.assertEqual(results[0][0]['job'], results[1][0]['job'])
+
+        expected = [m.pattern for m in Miner(**PARAMS).mine(data)]
+        for events in results:
+            kinds = [event['event'] for event in events]
+            self.assertEqual('done', kinds[-1])
+            self.assertIn('stage', kinds)
+            self.assertIn('motifs', kinds)
+            self.assertListEqual(expected, [m[0] for m in events[-1]['motifs']])
+
+        self.assertEqual(1, len(invalid))
+        self.assertEqual('error', invalid[0]['event'])
+        self.assertDictEqual({}, service.jobs)
+
+    def test_parameters(self):
+        service = Service()
+        for params in [
+            {**PARAMS, 'checkpoint': join(self.tmp.name, 'checkpoint.npz')},
+            {**PARAMS, 'callback': print},
+            {**PARAMS, 'processes': 4},
+        ]:
+            with self.assertRaises(ValueError):
+                service.parse({'data': data, 'params': params})
+
+    def test_path_key(self):
+        service = Service()
+        path = join(self.tmp.name, 'data.csv')
+        keys = []
+        for n in [10, 20]:
+            with open(path, 'w') as fp:
+                fp.write('\n'.join(map(str, range(n))))
+            keys.append(service.parse({'path': path, 'params': PARAMS})[0])
+
+        # A changed file is a different job
+        self.assertNotEqual(keys[0], keys[1])
+        self.assertEqual(keys[1], service.parse({'path': path, 'params': PARAMS})[0])
+
+    def test_http(self):
+        asyncio.run(self.run_http())
+
+    async def run_http(self):
+        service = Service(1)
+        server = await service.start(port=0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(b'GET / HTTP/1.1\r\nHost: localhost\r\n\r\n')
+            response = await reader.read()
+            writer.close()
+        finally:
+            server.close()
+            service.close()
+        self.assertTrue(response.startswith(b'HTTP/1.1 400 Bad Request\r\n'))
+        self.assertIn(b'"event": "error"', response)
+
+    def test_tcp(self):
+        asyncio.run(self.run_tcp())
+
+    async def run_tcp(self):
+        service = Service(1)
+        server = await service.start(port=0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            job = {'data': data[:20], 'params': PARAMS}
+            events = await collect(submit(job, port=port))
+        finally:
+            server.close()
+            service.close()
+        self.assertEqual('done', events[-1]['event'])
@@ -0,0 +1,38 @@
+import unittest
+
+from test_data import data, seq_1
+
+from frm import Miner
+from frm.patterns import PatternMiner
+from frm.stats import Stats
+
+
+class TestStats(unittest.TestCase):
+    def test_levels(self):
+        stats = Stats()
+        pm = PatternMiner(0.5, 1, stats)
+        pm.mine(seq_1)
+
+        self.assertListEqual([1, 2, 3], [level['k'] for level in stats.levels])
+        self.assertListEqual([2, 3, 0], [level['kept'] for level in stats.levels])
+        self.assertEqual(30, stats.levels[0]['occurrences'])
+        self.assertIn('remove_redundant', stats.stages)
+
+    def test_miner(self):
+        stages = []
+        miner = Miner(0.3, 5, 4, k=3, callback=lambda name, stats: stages.append(name))
+        miner.mine(data[:20])
+
+        self.assertListEqual(['sax', 'patterns', 'remove_redundant', 'map'], stages)
+        self.assertListEqual(stages, list(miner.stats.stages))
+        self.assertGreater(miner.stats.abandoned, 0)
+
+    def test_abandon(self):
+        expected = Miner(0.3, 5, 4).mine(data[:20])[:3]
+        got = Miner(0.3, 5, 4, k=3).mine(data[:20])
+        self.assertListEqual(expected, got)
+
+    def test_disabled(self):
+        miner = Miner(0.3, 5, 4)
+        miner.mine(data[:20])
+        self.assertIsNone(miner.stats)
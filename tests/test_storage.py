@@ -0,0 +1,96 @@
+import unittest
+from tempfile import TemporaryDirectory
+from threading import Thread
+
+import numpy as np
+from test_data import data, rag, rseq_2, seq_2, ts
+
+from frm import Miner
+from frm.preprocessing import reduce_runs, sax, standardise
+from frm.storage import FlatDataset
+
+
+class TestFlatDataset(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_create(self):
+        ds = FlatDataset.create(self.tmp.name, rag)
+        self.assertEqual(len(ds), len(rag))
+        for expected, got in zip(rag, ds):
+            self.assertListEqual(expected, got.tolist())
+
+    def test_reopen(self):
+        FlatDataset.create(self.tmp.name, (np.array(t) for t in rag), np.float32)
+        ds = FlatDataset(self.tmp.name)
+        self.assertEqual(ds.values.dtype, np.float32)
+        self.assertListEqual(rag[2], ds[2].tolist())
+
+    def test_sax(self):
+        ds = FlatDataset.create(self.tmp.name, ts)
+        self.assertListEqual(seq_2, [str(s) for s in ds.sax(2, 3)])
+
+    def test_rag_sax(self):
+        ds = FlatDataset.create(self.tmp.name, rag)
+        self.assertListEqual(rseq_2, [str(s) for s in ds.sax(2, 3)])
+        self.assertListEqual(
+            sax(data, 5, 4),
+            [str(s) for s in FlatDataset.create(self.tmp.name, data).sax(5, 4)],
+        )
+
+    def test_conflicting_sax(self):
+        FlatDataset.create(self.tmp.name, data)
+        expected = {params: sax(data, *params) for params in [(5, 4), (2, 3), (5, 3)]}
+        results = {}
+
+        def discretise(params):
+            results[params] = FlatDataset(self.tmp.name).sax(*params)
+
+        threads = [
+            Thread(target=discretise, args=(p,)) for p in expected for _ in range(2)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # Mapped symbols stay valid while other parameters are discretised
+        self.assertListEqual(expected[5, 4], [str(s) for s in results[5, 4]])
+        FlatDataset(self.tmp.name).sax(5, 4, diff=1)
+        for params, sequences in results.items():
+            self.assertListEqual(expected[params], [str(s) for s in sequences])
+
+        # Recreating the dataset discards stale symbols
+        ds = FlatDataset.create(self.tmp.name, rag)
+        self.assertListEqual(rseq_2, [str(s) for s in ds.sax(2, 3)])
+
+    def test_symbol_view(self):
+        ds = FlatDataset.create(self.tmp.name, rag)
+        sequence = ds.sax(2, 3)[1]
+        self.assertEqual(sequence[0:2], 'ac')
+        self.assertListEqual(list(sequence), ['a', 'c'])
+
+    def test_reduce_runs(self):
+        ds = FlatDataset.create(self.tmp.name, data)
+        sequences = ds.sax(5, 4)
+        self.assertTrue(np.shares_memory(sequences.buffer, np.asarray(sequences[1])))
+        expected = reduce_runs([str(s) for s in sequences])
+        reduced, positions = reduce_runs(sequences)
+        self.assertListEqual(expected[0], reduced)
+        for a, b in zip(expected[1], positions):
+            self.assertListEqual(a.tolist(), b.tolist())
+
+    def test_standardised(self):
+        ds = FlatDataset.create(self.tmp.name, data)
+        for expected, got in zip(standardise(data), ds.standardised()):
+            np.testing.assert_allclose(expected[3:10], got[3:10])
+
+    def test_miner(self):
+        expected = Miner(0.3, 5, 4, k=5).mine(data)
+        got = Miner(0.3, 5, 4, k=5).mine(FlatDataset.create(self.tmp.name, data))
+        self.assertListEqual([m.pattern for m in expected], [m.pattern for m in got])
+        for a, b in zip(expected, got):
+            self.assertAlmostEqual(a.distance, b.distance)
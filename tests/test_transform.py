@@ -0,0 +1,41 @@
+import unittest
+import warnings
+from importlib.util import find_spec
+
+import numpy as np
+from test_data import data
+
+from frm import Miner
+from frm.transform import transform
+
+
+class TestTransform(unittest.TestCase):
+    def setUp(self):
+        self.miner = Miner(0.3, 5, 4, k=5)
+        self.motifs = self.miner.mine(data)
+
+    @unittest.skipUnless(find_spec('mass_ts'), 'mass_ts is not installed')
+    def test_transform(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            from mass_ts import mass2 as mass
+
+        distances = self.miner.transform(data[:20])
+        self.assertEqual((20, 5), distances.shape)
+        for i, series in enumerate(data[:20]):
+            for j, motif in enumerate(self.motifs):
+                m = np.abs(mass(np.asarray(series, float), motif.representative))
+                expected = m.min() / motif.length**0.5
+                self.assertAlmostEqual(expected, distances[i, j])
+
+    def test_memory_cap(self):
+        expected = transform(data, self.motifs)
+        distances = transform(data, self.motifs, max_workers=3, max_bytes=0)
+        np.testing.assert_allclose(expected, distances)
+
+    def test_short(self):
+        distances = transform([[0, 1, 0], data[0]], self.motifs)
+        self.assertTrue(np.isnan(distances[0]).all())
+        self.assertFalse(np.isnan(distances[1]).any())
+        distances = transform([np.ones(100)], self.motifs)
+        self.assertTrue(np.isfinite(distances).all())
@@ -0,0 +1,107 @@
+import unittest
+from tempfile import TemporaryDirectory
+
+import numpy as np
+
+from frm import Miner
+from frm.estimate import estimate
+from frm.preprocessing import sax, standardise
+from frm.storage import FlatDataset, Series, SymbolView
+from frm.windows import split, window_origins
+
+
+class TestWindows(unittest.TestCase):
+    def test_window_origins(self):
+        origins = window_origins([10, 23, 4], 10, 5)
+        self.assertListEqual(
+            [(0, 0), (1, 0), (1, 5), (1, 10), (1, 13), (2, 0)], origins
+        )
+        # Last window is aligned to segments
+        self.assertListEqual(
+            [(0, 0), (0, 4), (0, 8), (0, 12)], window_origins([23], 10, 4, 2)
+        )
+        with self.assertRaises(ValueError):
+            window_origins([23], 10, 5, 2)
+
+    def test_split(self):
+        x = np.arange(20)
+        origins = window_origins([20], 8, 4, 2)
+        windows = split([x], origins, 8)
+        self.assertListEqual([0, 4, 8, 12], [w[0] for w in windows])
+        self.assertTrue(all(np.shares_memory(x, w) for w in windows))
+        self.assertListEqual(
+            ['abcd', 'cdef', 'efgh', 'ghij'], split(['abcdefghij'], origins, 8, 2)
+        )
+
+    def test_split_flat_dataset(self):
+        rng = np.random.default_rng(0)
+        x = np.sin(np.arange(2000) / 8) + 0.3 * rng.standard_normal(2000)
+        origins = window_origins([len(x)], 200, 100, 5)
+        with TemporaryDirectory() as tmp:
+            ds = FlatDataset.create(tmp, [x])
+
+            # Windows are views that read nothing until they are used
+            windows = split(ds.standardised(), origins, 200)
+            self.assertTrue(all(isinstance(w, Series) for w in windows))
+            self.assertTrue(all(np.shares_memory(ds.values, w.values) for w in windows))
+            for expected, got in zip(split(standardise([x]), origins, 200), windows):
+                np.testing.assert_allclose(expected, np.asarray(got))
+            sequences = split(ds.sax(5, 4), origins, 200, 5)
+            self.assertTrue(all(isinstance(s, SymbolView) for s in sequences))
+            expected = split(sax([x], 5, 4), origins, 200, 5)
+            self.assertListEqual(expected, [str(s) for s in sequences])
+
+            miner = Miner(0.3, 5, 4, k=5, window=200)
+            motifs = Miner(0.3, 5, 4, k=5, window=200).mine([x])
+            got = miner.mine(ds)
+            self.assertListEqual([m.pattern for m in motifs], [m.pattern for m in got])
+            self.assertListEqual(
+                [m.locations for m in motifs], [m.locations for m in got]
+            )
+
+    def test_miner(self):
+        rng = np.random.default_rng(0)
+        x = np.sin(np.arange(5000) / 8) + 0.3 * rng.standard_normal(5000)
+        miner = Miner(0.3, 5, 4, k=5, window=200, stats=True)
+        self.assertEqual(100, miner.step)
+        motifs = miner.mine([x])
+        self.assertTrue(0 < len(motifs) <= 5)
+        windows = window_origins([len(x)], 200, 100, 5)
+        for motif in motifs:
+            self.assertGreaterEqual(len(motif.get_all_indexes()), 0.3 * len(windows))
+            self.assertEqual(len(set(motif.best_matches)), len(motif.best_matches))
+            self.assertLessEqual(len(motif.locations), len(motif.best_matches))
+            for w, start in motif.best_matches.items():
+                i, offset = windows[w]
+                self.assertIn((i, offset + start), motif.locations)
+            for i, start in motif.locations:
+                self.assertEqual(0, i)
+                self.assertLessEqual(start + motif.length, len(x))
+
+        with self.assertRaises(ValueError):
+            Miner(0.3, 5, 4, window=200).mine(np.stack([[x, x]]))
+
+    def test_short_patterns(self):
+        rng = np.random.default_rng(0)
+        x = np.sin(np.arange(2000) / 8) + 0.3 * rng.standard_normal(2000)
+        miner = Miner(0.3, 25, 3, window=200)
+        motifs = [m for m in miner.mine([x]) if m.segments() < 3]
+        self.assertTrue(motifs)
+
+        # Locations of untrimmed patterns are positions in the time series too
+        sequence = sax([x], 25, 3)[0]
+        for motif in motifs:
+            for w, start in motif.best_matches.items():
+                self.assertEqual(0, start % 25)
+                self.assertIn(start // 25, motif.get_all_indexes()[w])
+            for i, start in motif.locations:
+                self.assertEqual(0, i)
+                pattern = sequence[start // 25 :][: len(motif.pattern)]
+                self.assertEqual(motif.pattern, pattern)
+
+    def test_estimate(self):
+        x = np.sin(np.arange(2000) / 8)
+        miner = Miner(0.3, 5, 4, window=200)
+        windows = split(sax([x], 5, 4), window_origins([len(x)], 200, 100, 5), 200, 5)
+        self.assertDictEqual(estimate(windows, 0.3, 5), miner.estimate([x]))
+        self.assertNotEqual(Miner(0.3, 5, 4).estimate([x]), miner.estimate([x]))